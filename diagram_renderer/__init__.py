@@ -21,6 +21,7 @@ class DiagramRenderer:
             ("plantuml", PlantUMLRenderer()),
             ("graphviz", GraphvizRenderer()),
         ]
+        self._renderers_by_name: dict[str, BaseRenderer] = dict(self.renderers)
 
     def _extract_all_code_blocks(self, code: str, prefixes: list[str]) -> list[str]:
         """
@@ -112,6 +113,37 @@ class DiagramRenderer:
         else:
             return None  # Return None to indicate no diagrams were successfully rendered
 
+    def render_known(self, code: str, diagram_type: str) -> str:
+        """
+        Render code with the renderer for an already known diagram type.
+
+        Skips markdown extraction and type detection, for callers that know what
+        they are rendering, e.g. the bundled examples.
+
+        Args:
+            code: Diagram code without markdown fences
+            diagram_type: Renderer name ("mermaid", "plantuml" or "graphviz")
+
+        Returns:
+            Rendered HTML content, or error HTML if rendering fails
+
+        Raises:
+            ValueError: If diagram_type is not a known renderer name
+        """
+        renderer = self._renderers_by_name.get(diagram_type)
+        if renderer is None:
+            raise ValueError(f"Unknown diagram type: {diagram_type!r}")
+        return self._render_with(renderer, code)
+
+    def _render_with(self, renderer: BaseRenderer, code_to_process: str) -> str:
+        """Clean and render code with the given renderer, returning error HTML on failure"""
+        try:
+            final_cleaned_code = renderer.clean_code(code_to_process)
+            return renderer.render_html(final_cleaned_code)
+        except Exception as e:
+            # Generate user-friendly error HTML instead of None
+            return generate_rendering_error_html(type(e).__name__, str(e), code_to_process)
+
     def _render_single_diagram(self, code_to_process: str) -> str:
         """
         Render a single diagram code block using the appropriate renderer.
@@ -133,8 +165,7 @@ class DiagramRenderer:
 
             if detected_renderer:
                 # Use the detected renderer
-                final_cleaned_code = detected_renderer.clean_code(code_to_process)
-                return detected_renderer.render_html(final_cleaned_code)
+                return self._render_with(detected_renderer, code_to_process)
             else:
                 # No specific type detected - generate helpful error
                 return generate_type_detection_error_html(code_to_process)
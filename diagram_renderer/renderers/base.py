@@ -1,4 +1,5 @@
 import json
+import re
 from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Any, Optional
@@ -9,6 +10,25 @@ from ..template_engine import TemplateEngine
 # Template name constants
 TEMPLATE_UNIFIED = "unified.html"
 
+# Placeholders filled in by renderers, matched in a single pass over the template
+_PLACEHOLDER_RE = re.compile(
+    r"\{(js_content|diagram_content|panzoom_js_content|escaped_original)\}"
+)
+
+# Default render function in the unified template, replaced by renderer-specific scripts
+DEFAULT_RENDER_FUNCTION = """        // Diagram rendering function - to be overridden by specific renderers
+        function renderDiagram() {
+            // Default implementation - just show the content
+            loading.style.display = 'none';
+            diagramContent.style.display = 'block';
+
+            // Initialize pan/zoom after content is ready
+            setTimeout(() => {
+                initializePanZoom();
+                diagramReady = true;
+            }, 100);
+        }"""
+
 
 class BaseRenderer(ABC):
     """Base class for diagram renderers"""
@@ -73,6 +93,17 @@ class BaseRenderer(ABC):
             resource_type="static/js", filename=filename, fallback_paths=fallback_paths
         )
 
+    def get_static_js_path(self, filename: str) -> Path:
+        """Get the path of a bundled JavaScript file without reading it.
+
+        Args:
+            filename: Name of the JavaScript file
+
+        Returns:
+            Resolved path to the file (which may not exist)
+        """
+        return (self.static_dir / "js" / filename).resolve()
+
     def get_template_content(self, filename: str) -> Optional[str]:
         """Get HTML template content from templates directory with caching.
 
@@ -221,25 +252,26 @@ class BaseRenderer(ABC):
         """
         escaped_original = json.dumps(original_code)
 
-        # Define the default render function to be replaced
-        default_render_function = """        // Diagram rendering function - to be overridden by specific renderers
-        function renderDiagram() {
-            // Default implementation - just show the content
-            loading.style.display = 'none';
-            diagramContent.style.display = 'block';
+        # Replace all template variables
+        html = self._substitute_placeholders(
+            template,
+            {
+                "js_content": viz_js,
+                "panzoom_js_content": panzoom_js,
+                "diagram_content": "",  # Content will be set by JS
+                "escaped_original": escaped_original,
+            },
+        )
+        return html.replace(DEFAULT_RENDER_FUNCTION, vizjs_script)
 
-            // Initialize pan/zoom after content is ready
-            setTimeout(() => {
-                initializePanZoom();
-                diagramReady = true;
-            }, 100);
-        }"""
+    def _substitute_placeholders(self, template: str, values: dict[str, str]) -> str:
+        """Fill template placeholders in a single pass.
 
-        # Replace all template variables
-        html = template.replace("{js_content}", viz_js)
-        html = html.replace("{panzoom_js_content}", panzoom_js)
-        html = html.replace("{diagram_content}", "")  # Content will be set by JS
-        html = html.replace("{escaped_original}", escaped_original)
-        html = html.replace(default_render_function, vizjs_script)
+        Args:
+            template: HTML template content
+            values: Replacement text keyed by placeholder name
 
-        return html
+        Returns:
+            Template with every known placeholder replaced
+        """
+        return _PLACEHOLDER_RE.sub(lambda match: values[match.group(1)], template)
@@ -5,7 +5,7 @@ from ..external_diagrams import (
     detect_external_diagram_requirements,
     get_external_diagram_indicators,
 )
-from .base import TEMPLATE_UNIFIED, BaseRenderer
+from .base import DEFAULT_RENDER_FUNCTION, TEMPLATE_UNIFIED, BaseRenderer
 
 
 class MermaidRenderer(BaseRenderer):
@@ -305,25 +305,13 @@ class MermaidRenderer(BaseRenderer):
         self, template, mermaid_js, panzoom_js, clean_code, escaped_original, mermaid_script
     ):
         """Replace all placeholders in the template for Mermaid rendering"""
-        # Define the default render function to be replaced
-        default_render_function = """        // Diagram rendering function - to be overridden by specific renderers
-        function renderDiagram() {
-            // Default implementation - just show the content
-            loading.style.display = 'none';
-            diagramContent.style.display = 'block';
-
-            // Initialize pan/zoom after content is ready
-            setTimeout(() => {
-                initializePanZoom();
-                diagramReady = true;
-            }, 100);
-        }"""
-
-        # Replace template variables
-        html = template.replace("{js_content}", mermaid_js)
-        html = html.replace("{panzoom_js_content}", panzoom_js)
-        html = html.replace("{diagram_content}", f'<div class="mermaid">{clean_code}</div>')
-        html = html.replace("{escaped_original}", escaped_original)
-        html = html.replace(default_render_function, mermaid_script)
-
-        return html
+        html = self._substitute_placeholders(
+            template,
+            {
+                "js_content": mermaid_js,
+                "panzoom_js_content": panzoom_js,
+                "diagram_content": f'<div class="mermaid">{clean_code}</div>',
+                "escaped_original": escaped_original,
+            },
+        )
+        return html.replace(DEFAULT_RENDER_FUNCTION, mermaid_script)
@@ -5,6 +5,7 @@ Simple FastAPI web application demonstrating diagram-renderer REST API
 This provides both a REST API and a web interface for rendering diagrams.
 """
 
+import json
 import logging
 from pathlib import Path
 from typing import Literal, Optional
@@ -14,7 +15,7 @@ try:
     from fastapi import FastAPI, HTTPException, Request
     from fastapi.responses import HTMLResponse, Response
     from fastapi.staticfiles import StaticFiles
-    from pydantic import BaseModel, Field
+    from pydantic import BaseModel, ConfigDict, Field
 except ImportError:
     print("FastAPI dependencies not installed. Run: uv sync --extra webapp")
     exit(1)
@@ -42,6 +43,9 @@ renderer = DiagramRenderer()
 class DiagramRequest(BaseModel):
     """Request model for diagram rendering"""
 
+    # Reject unknown fields during validation, before any rendering work
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     code: str = Field(..., description="Diagram source code")
     type: Optional[Literal["auto", "mermaid", "plantuml", "graphviz"]] = Field(
         "auto", description="Diagram type (auto-detect if not specified)"
@@ -405,10 +409,14 @@ Animal <|-- Dog
     """
 
 
+# Static JSON payloads, serialized once at import instead of on every request
+_HEALTH_BYTES = json.dumps({"status": "healthy", "service": "diagram-renderer"}).encode()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "diagram-renderer"}
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
 
 
 @app.post("/api/render", response_model=DiagramResponse)
@@ -454,10 +462,8 @@ async def render_diagram(request: DiagramRequest):
         )
 
 
-@app.get("/api/examples")
-async def get_examples():
-    """Get example diagrams for each type"""
-    return {
+_EXAMPLES_BYTES = json.dumps(
+    {
         "mermaid": {
             "flowchart": "graph TD\\n    A[Start] --> B{Decision}\\n    B -->|Yes| C[End]",
             "sequence": "sequenceDiagram\\n    Alice->>Bob: Hello\\n    Bob-->>Alice: Hi!",
@@ -471,6 +477,13 @@ async def get_examples():
             "network": "graph network {\\n    Server -- Database\\n    Server -- Client\\n}",
         },
     }
+).encode()
+
+
+@app.get("/api/examples")
+async def get_examples():
+    """Get example diagrams for each type"""
+    return Response(content=_EXAMPLES_BYTES, media_type="application/json")
 
 
 def main():
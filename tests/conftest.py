@@ -10,7 +10,8 @@ import pytest
 
 # Add the project root to Python path
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
 from diagram_renderer import DiagramRenderer
 from diagram_renderer.renderers import GraphvizRenderer, MermaidRenderer, PlantUMLRenderer
@@ -34,6 +35,37 @@ def graphviz_renderer():
     return GraphvizRenderer()
 
 
+@pytest.fixture(scope="session")
+def examples_dir():
+    """Put the examples directory on the Python path once for the whole session"""
+    examples_path = project_root / "examples"
+    if str(examples_path) not in sys.path:
+        sys.path.insert(0, str(examples_path))
+    return examples_path
+
+
+@pytest.fixture(scope="class")
+def mermaid():
+    """
+    MermaidRenderer shared by every test in a class.
+
+    Unlike the function-scoped mermaid_renderer, tests must only patch it in a
+    with block or via monkeypatch so the patch is undone before the next test.
+    """
+    return MermaidRenderer()
+
+
+@pytest.fixture(scope="class")
+def graphviz():
+    """
+    GraphvizRenderer shared by every test in a class.
+
+    Unlike the function-scoped graphviz_renderer, tests must only patch it in a
+    with block or via monkeypatch so the patch is undone before the next test.
+    """
+    return GraphvizRenderer()
+
+
 @pytest.fixture
 def diagram_renderer():
     """Create a DiagramRenderer instance for testing"""
@@ -73,6 +73,17 @@ class TestBaseRenderer:
         assert len(result) > 0
         assert "mermaid" in result.lower()
 
+    def test_get_static_js_path(self):
+        """Test get_static_js_path resolves bundled files without reading them"""
+        renderer = MockRenderer()
+
+        path = renderer.get_static_js_path("panzoom.min.js")
+        assert path.is_absolute()
+        assert path.parent == (renderer.static_dir / "js").resolve()
+        assert path.exists()
+
+        assert not renderer.get_static_js_path("nonexistent.js").exists()
+
     def test_inheritance_structure(self):
         """Test that BaseRenderer follows proper inheritance"""
         from abc import ABC
@@ -5,7 +5,6 @@ Integration tests for Streamlit dashboard functionality
 import os
 import signal
 import subprocess
-import sys
 import time
 from pathlib import Path
 
@@ -30,13 +29,8 @@ class TestDashboardIntegration:
 
     @pytest.mark.integration
     @pytest.mark.slow
-    def test_dashboard_imports(self):
+    def test_dashboard_imports(self, examples_dir):
         """Test that dashboard.py can be imported without errors"""
-
-        # Add examples directory to path
-        examples_dir = Path(__file__).parent.parent / "examples"
-        sys.path.insert(0, str(examples_dir))
-
         try:
             import dashboard
 
@@ -51,8 +45,6 @@ class TestDashboardIntegration:
                 pytest.skip("Streamlit not in test mode")
             else:
                 pytest.fail(f"Dashboard import failed with unexpected error: {e}")
-        finally:
-            sys.path.remove(str(examples_dir))
 
     @pytest.mark.integration
     @pytest.mark.slow
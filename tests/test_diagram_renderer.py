@@ -104,6 +104,30 @@ class TestDiagramRenderer:
         result = diagram_renderer.render_diagram_auto(sample_graphviz_simple)
         assert mock_html_content in result
 
+    def test_render_known_skips_detection(self, diagram_renderer, monkeypatch):
+        """Test that render_known uses the named renderer without detecting the type"""
+        mock_html_content = "<svg>Graphviz Mock SVG</svg>"
+        graphviz_renderer_instance = diagram_renderer.renderers[2][1]
+        monkeypatch.setattr(
+            graphviz_renderer_instance,
+            "render_html",
+            lambda code, **kwargs: f"<html><body>{mock_html_content}</body></html>",
+        )
+        for _, renderer in diagram_renderer.renderers:
+            monkeypatch.setattr(
+                renderer,
+                "detect_diagram_type",
+                lambda code: pytest.fail("render_known should not detect the type"),
+            )
+
+        result = diagram_renderer.render_known("digraph G { A -> B }", "graphviz")
+        assert mock_html_content in result
+
+    def test_render_known_unknown_type(self, diagram_renderer):
+        """Test that render_known rejects unknown diagram types"""
+        with pytest.raises(ValueError, match="Unknown diagram type"):
+            diagram_renderer.render_known("graph TD; A --> B", "visio")
+
 
 class TestDiagramRendererIntegration:
     """Integration tests for DiagramRenderer"""
@@ -0,0 +1,197 @@
+"""
+Tests for the screenshot comparison fast paths used by visual regression testing
+"""
+
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from tests.visual.image_comparison import ImageComparator, _png_image_crcs
+
+Image = pytest.importorskip("PIL.Image")
+PngImagePlugin = pytest.importorskip("PIL.PngImagePlugin")
+
+
+@pytest.fixture
+def comparator():
+    """ImageComparator with the default similarity threshold"""
+    return ImageComparator()
+
+
+def _save_png(path, color=(30, 60, 90), size=(40, 20), text=None):
+    """Save a solid-colour PNG, optionally with a tEXt metadata chunk"""
+    info = None
+    if text is not None:
+        info = PngImagePlugin.PngInfo()
+        info.add_text("Comment", text)
+    Image.new("RGB", size, color).save(path, pnginfo=info)
+    return path
+
+
+class TestPngImageCrcs:
+    """Test cases for the PNG chunk walker"""
+
+    def test_identical_images_have_matching_crcs(self, tmp_path):
+        """Test that the same pixels saved twice give the same size and CRCs"""
+        first = _save_png(tmp_path / "first.png")
+        second = _save_png(tmp_path / "second.png")
+
+        result = _png_image_crcs(first)
+        assert result is not None
+        assert result[0] == (40, 20)
+        assert result == _png_image_crcs(second)
+
+    def test_metadata_only_difference_keeps_crcs(self, tmp_path):
+        """Test that ancillary chunks such as tEXt don't affect the pixel CRCs"""
+        plain = _save_png(tmp_path / "plain.png")
+        tagged = _save_png(tmp_path / "tagged.png", text="captured on another machine")
+
+        assert plain.read_bytes() != tagged.read_bytes()
+        assert _png_image_crcs(plain) == _png_image_crcs(tagged)
+
+    def test_different_pixels_change_crcs(self, tmp_path):
+        """Test that different image data gives different CRCs"""
+        first = _save_png(tmp_path / "first.png")
+        second = _save_png(tmp_path / "second.png", color=(200, 60, 90))
+
+        assert _png_image_crcs(first) != _png_image_crcs(second)
+
+    def test_truncated_png(self, tmp_path):
+        """Test that a PNG cut off before IEND is rejected"""
+        data = _save_png(tmp_path / "full.png").read_bytes()
+        truncated = tmp_path / "truncated.png"
+        truncated.write_bytes(data[: len(data) // 2])
+
+        assert _png_image_crcs(truncated) is None
+
+    def test_non_png_and_missing_files(self, tmp_path):
+        """Test that files without a PNG signature, or missing files, are rejected"""
+        not_png = tmp_path / "not_png.png"
+        not_png.write_bytes(b"GIF89a" + bytes(64))
+
+        assert _png_image_crcs(not_png) is None
+        assert _png_image_crcs(tmp_path / "missing.png") is None
+
+    def test_compare_uses_crc_fast_path_for_metadata_changes(self, comparator, tmp_path):
+        """Test that metadata-only differences pass without decoding the images"""
+        plain = _save_png(tmp_path / "plain.png")
+        tagged = _save_png(tmp_path / "tagged.png", text="captured on another machine")
+
+        result = comparator.compare_images_pillow(plain, tagged)
+        assert result["method"] == "png_crc"
+        assert result["passed"] is True
+        assert result["total_pixels"] == 40 * 20
+
+
+class TestImagesIdenticalByHash:
+    """Test cases for the size, tail and fingerprint byte-equality check"""
+
+    def test_identical_files(self, comparator, tmp_path):
+        """Test that byte-identical files are reported identical"""
+        first = tmp_path / "first.png"
+        second = tmp_path / "second.png"
+        first.write_bytes(b"\x00" * 64 + b"tail")
+        second.write_bytes(b"\x00" * 64 + b"tail")
+
+        assert comparator.images_identical_by_hash(first, second)
+
+    def test_different_sizes(self, comparator, tmp_path, monkeypatch):
+        """Test that files of different sizes are rejected without fingerprinting"""
+        first = tmp_path / "first.png"
+        second = tmp_path / "second.png"
+        first.write_bytes(b"\x00" * 64)
+        second.write_bytes(b"\x00" * 65)
+        monkeypatch.setattr(
+            comparator,
+            "calculate_image_fingerprint",
+            lambda path: pytest.fail("sizes differ, so no fingerprint is needed"),
+        )
+
+        assert not comparator.images_identical_by_hash(first, second)
+
+    def test_same_size_different_tails(self, comparator, tmp_path, monkeypatch):
+        """Test that same-size files whose last bytes differ are rejected without fingerprinting"""
+        first = tmp_path / "first.png"
+        second = tmp_path / "second.png"
+        first.write_bytes(b"\x00" * 64 + b"tail")
+        second.write_bytes(b"\x00" * 64 + b"TAIL")
+        monkeypatch.setattr(
+            comparator,
+            "calculate_image_fingerprint",
+            lambda path: pytest.fail("tails differ, so no fingerprint is needed"),
+        )
+
+        assert not comparator.images_identical_by_hash(first, second)
+
+    def test_same_size_same_tail_different_content(self, comparator, tmp_path):
+        """Test that the fingerprint catches differences before the tail"""
+        first = tmp_path / "first.png"
+        second = tmp_path / "second.png"
+        first.write_bytes(b"\x00" * 64 + b"tail")
+        second.write_bytes(b"\x01" + b"\x00" * 63 + b"tail")
+
+        assert not comparator.images_identical_by_hash(first, second)
+
+    def test_missing_file(self, comparator, tmp_path):
+        """Test that a missing file is never reported identical"""
+        first = tmp_path / "first.png"
+        first.write_bytes(b"\x00" * 64)
+
+        assert not comparator.images_identical_by_hash(first, tmp_path / "missing.png")
+
+
+class BrokenPool:
+    """Stand-in for a process pool whose workers died on startup"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, *args):
+        raise BrokenProcessPool("A child process terminated abruptly")
+
+    def map(self, *args, **kwargs):
+        raise BrokenProcessPool("A child process terminated abruptly")
+
+
+class TestBrokenProcessPool:
+    """Test that comparisons fall back to the parent process when the pool breaks"""
+
+    @pytest.fixture
+    def screenshots(self, tmp_path):
+        """Baseline and current screenshots for two examples, one of them changed"""
+        baseline_dir = tmp_path / "baselines"
+        current_dir = tmp_path / "current"
+        baseline_dir.mkdir()
+        current_dir.mkdir()
+        for name in ("same", "changed"):
+            _save_png(baseline_dir / f"{name}.png")
+        _save_png(current_dir / "same.png")
+        _save_png(current_dir / "changed.png", color=(200, 60, 90))
+        return baseline_dir, current_dir, tmp_path / "diffs"
+
+    def test_broken_pool_compares_serially(self, comparator, screenshots, monkeypatch):
+        """Test that a pool that cannot start still yields every comparison result"""
+        monkeypatch.setattr(comparator, "process_pool", lambda max_workers: BrokenPool())
+
+        results = comparator.compare_diagram_examples(
+            *screenshots, {"same.html": {}, "changed.html": {}}
+        )
+        assert results["passed"] == ["same.html"]
+        assert results["failed"] == ["changed.html"]
+
+    def test_broken_pending_comparison_compares_serially(self, comparator, screenshots):
+        """Test that a comparison started on a pool that broke is redone in-process"""
+        baseline_dir, current_dir, diff_dir = screenshots
+        pending = comparator.start_batch(
+            BrokenPool(), baseline_dir, current_dir, diff_dir, {"same.html": {}}, {}
+        )
+        assert isinstance(pending["same.html"], Future)
+
+        results = comparator.compare_diagram_examples(
+            baseline_dir, current_dir, diff_dir, {"same.html": {}}, pending
+        )
+        assert results["passed"] == ["same.html"]
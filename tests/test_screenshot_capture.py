@@ -0,0 +1,99 @@
+"""
+Tests for the screenshot capturer's example server and exit handling
+"""
+
+import signal
+import socket
+import urllib.request
+
+import pytest
+
+from tests.visual import screenshot_capture
+from tests.visual.screenshot_capture import (
+    DiagramScreenshotCapture,
+    _acquire_sigterm_handler,
+    _raise_system_exit,
+    _release_sigterm_handler,
+)
+
+
+@pytest.fixture
+def default_sigterm(monkeypatch):
+    """Start from the default SIGTERM disposition and put the original back afterwards"""
+    original = signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    monkeypatch.setattr(screenshot_capture, "_sigterm_users", 0)
+    monkeypatch.setattr(screenshot_capture, "_previous_sigterm_handler", None)
+    yield
+    signal.signal(signal.SIGTERM, original)
+
+
+class TestExampleServer:
+    """Test the local HTTP server that serves examples to the browser"""
+
+    def test_busy_port_moves_to_next_free_port(self, tmp_path):
+        """Test that a port another process listens on is skipped"""
+        (tmp_path / "example.html").write_text("<html>ok</html>")
+        with socket.socket() as busy:
+            busy.bind(("127.0.0.1", 0))
+            busy.listen()
+            busy_port = busy.getsockname()[1]
+
+            capturer = DiagramScreenshotCapture(server_port=busy_port)
+            assert capturer.start_local_server(tmp_path)
+            try:
+                assert capturer.server_port != busy_port
+                assert capturer.base_url == f"http://127.0.0.1:{capturer.server_port}"
+                with urllib.request.urlopen(f"{capturer.base_url}/example.html") as response:
+                    assert response.read() == b"<html>ok</html>"
+            finally:
+                capturer.stop_local_server()
+
+        assert not capturer.server_running
+
+
+class TestSigtermHandler:
+    """Test the reference-counted SIGTERM handler shared by capturers"""
+
+    def test_last_release_restores_previous_handler(self, default_sigterm):
+        """Test that the handler in place before the first acquire comes back"""
+        assert _acquire_sigterm_handler()
+        assert signal.getsignal(signal.SIGTERM) is _raise_system_exit
+
+        _release_sigterm_handler()
+        assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+
+    def test_nested_acquire_does_not_restore_early(self, default_sigterm):
+        """Test that the handler stays installed until every holder has released it"""
+        assert _acquire_sigterm_handler()
+        assert _acquire_sigterm_handler()
+
+        _release_sigterm_handler()
+        assert signal.getsignal(signal.SIGTERM) is _raise_system_exit
+
+        _release_sigterm_handler()
+        assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+
+    def test_application_handler_is_left_alone(self, default_sigterm):
+        """Test that a handler installed by the application is never replaced"""
+
+        def app_handler(signum, frame):
+            pass
+
+        signal.signal(signal.SIGTERM, app_handler)
+        assert not _acquire_sigterm_handler()
+        assert signal.getsignal(signal.SIGTERM) is app_handler
+
+    def test_capturers_share_handler(self, default_sigterm, tmp_path):
+        """Test that stopping one of two servers keeps the handler for the other"""
+        first = DiagramScreenshotCapture(server_port=8150)
+        second = DiagramScreenshotCapture(server_port=8150)
+        assert first.start_local_server(tmp_path)
+        assert second.start_local_server(tmp_path)
+        try:
+            first.stop_local_server()
+            assert signal.getsignal(signal.SIGTERM) is _raise_system_exit
+        finally:
+            first.stop_local_server()
+            second.stop_local_server()
+
+        assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
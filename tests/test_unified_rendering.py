@@ -1,5 +1,9 @@
 """Comprehensive tests for unified rendering functionality"""
 
+import ast
+import os
+import re
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -12,6 +16,9 @@ from diagram_renderer.renderers.graphviz import GraphvizRenderer
 from diagram_renderer.renderers.mermaid import MermaidRenderer
 from diagram_renderer.renderers.plantuml import PlantUMLRenderer
 
+# unified_demo.py was replaced by dashboard.py
+_DEMO_PATH = Path(__file__).resolve().parent.parent / "examples" / "dashboard.py"
+
 
 class TestTemplateConstants:
     """Test template constant definitions and usage"""
@@ -34,11 +41,9 @@ class TestTemplateConstants:
 class TestBaseRendererHelperMethods:
     """Test new helper methods in BaseRenderer using concrete implementation"""
 
-    def test_generate_error_html(self):
+    def test_generate_error_html(self, mermaid):
         """Test standardized error HTML generation"""
-        renderer = MermaidRenderer()  # Use concrete renderer
-
-        error_html = renderer._generate_error_html("Test error message")
+        error_html = mermaid._generate_error_html("Test error message")
 
         # Check for new template format - it should be a full HTML page
         assert "error" in error_html.lower()
@@ -46,44 +51,37 @@ class TestBaseRendererHelperMethods:
         assert 'class="error-title"' in error_html
         assert "<p>Test error message</p>" in error_html
 
-    def test_get_vizjs_content(self):
+    def test_get_vizjs_content(self, graphviz):
         """Test VizJS content aggregation"""
-        renderer = GraphvizRenderer()  # Use concrete renderer that has VizJS methods
-
         # Mock the static JS content method
-        with patch.object(renderer, "get_static_js_content") as mock_get_js:
+        with patch.object(graphviz, "get_static_js_content") as mock_get_js:
             mock_get_js.side_effect = lambda filename: f"content_of_{filename}"
 
-            result = renderer._get_vizjs_content()
+            result = graphviz._get_vizjs_content()
 
             assert result == "content_of_viz-lite.js\ncontent_of_viz-full.js"
             assert mock_get_js.call_count == 2
 
-    def test_get_vizjs_content_missing_files(self):
+    def test_get_vizjs_content_missing_files(self, graphviz):
         """Test VizJS content when files are missing"""
-        renderer = GraphvizRenderer()
-
         # Mock missing files
-        with patch.object(renderer, "get_static_js_content", return_value=None):
-            result = renderer._get_vizjs_content()
+        with patch.object(graphviz, "get_static_js_content", return_value=None):
+            result = graphviz._get_vizjs_content()
             assert result is None
 
-    def test_generate_vizjs_rendering_script(self):
+    def test_generate_vizjs_rendering_script(self, graphviz):
         """Test VizJS JavaScript generation"""
-        renderer = GraphvizRenderer()
         code = "digraph G { A -> B }"
 
-        script = renderer._generate_vizjs_rendering_script(code)
+        script = graphviz._generate_vizjs_rendering_script(code)
 
         assert "function renderDiagram()" in script
         assert "new Viz()" in script
         assert "renderSVGElement" in script
         assert code.replace(" ", "\\u0020") in script or code in script
 
-    def test_populate_unified_template(self):
+    def test_populate_unified_template(self, graphviz):
         """Test unified template placeholder replacement"""
-        renderer = GraphvizRenderer()
-
         template = """<html><script>{js_content}</script><div>{diagram_content}</div><script>{panzoom_js_content}</script><script>const original = {escaped_original};</script>        // Diagram rendering function - to be overridden by specific renderers
         function renderDiagram() {
             // Default implementation - just show the content
@@ -97,7 +95,7 @@ class TestBaseRendererHelperMethods:
             }, 100);
         }</html>"""
 
-        result = renderer._populate_unified_template(
+        result = graphviz._populate_unified_template(
             template, "viz_js", "panzoom_js", "test code", "custom_script"
         )
 
@@ -107,118 +105,106 @@ class TestBaseRendererHelperMethods:
         assert "custom_script" in result
 
 
+# Control structure every unified template render must include
+COMMON_ELEMENTS = {
+    'class="control-btn"',
+    'class="diagram-container"',
+    "function downloadPNG",
+    "function copyDiagram",
+}
+_COMMON_ELEMENTS_RE = re.compile("|".join(re.escape(element) for element in COMMON_ELEMENTS))
+
+ERROR_MESSAGES = ["File not found", "Network error", "Template missing"]
+
+UNIFIED_RENDER_CASES = [
+    (MermaidRenderer, "graph TD\n    A --> B"),
+    (PlantUMLRenderer, "@startuml\nA -> B\n@enduml"),
+    (GraphvizRenderer, "digraph G { A -> B }"),
+]
+
+
 class TestUnifiedRenderingIntegration:
     """Integration tests for unified rendering across diagram types"""
 
-    def test_all_renderers_have_unified_capability(self):
+    @pytest.mark.parametrize("renderer_cls,code", UNIFIED_RENDER_CASES)
+    def test_all_renderers_have_unified_capability(self, renderer_cls, code):
         """Test that all renderers can produce unified output"""
-        test_cases = [
-            (MermaidRenderer(), "graph TD\n    A --> B"),
-            (PlantUMLRenderer(), "@startuml\nA -> B\n@enduml"),
-            (GraphvizRenderer(), "digraph G { A -> B }"),
-        ]
+        html = renderer_cls().render_html(code)
 
-        for renderer, code in test_cases:
-            html = renderer.render_html(code)
-
-            # Should produce valid HTML
-            assert html is not None
-            assert len(html) > 100
-            assert "<!DOCTYPE html>" in html or "<html>" in html
+        # Should produce valid HTML
+        assert html is not None
+        assert len(html) > 100
+        assert "<!DOCTYPE html>" in html or "<html>" in html
 
-    def test_unified_template_structure_consistency(self):
+    @pytest.mark.parametrize("renderer_cls,code", UNIFIED_RENDER_CASES)
+    def test_unified_template_structure_consistency(self, renderer_cls, code):
         """Test that unified templates have consistent structure"""
-        renderers = [MermaidRenderer(), PlantUMLRenderer(), GraphvizRenderer()]
-        codes = ["graph TD\n    A --> B", "@startuml\nA -> B\n@enduml", "digraph G { A -> B }"]
-
-        htmls = []
-        for renderer, code in zip(renderers, codes):
-            try:
-                if hasattr(renderer, "render_html_improved"):
-                    html = renderer.render_html_improved(code)
-                else:
-                    html = renderer.render_html(code)
-                htmls.append(html)
-            except Exception:
-                # Skip if rendering fails (dependency issues)
-                htmls.append(None)
-
-        # Filter out None results for comparison
-        valid_htmls = [h for h in htmls if h and "Error:" not in h]
-
-        if len(valid_htmls) >= 2:
-            # Check for consistent control structure in valid renders
-            common_elements = [
-                'class="control-btn"',
-                'class="diagram-container"',
-                "function downloadPNG",
-                "function copyDiagram",
-            ]
-
-            for element in common_elements:
-                for html in valid_htmls:
-                    assert element in html, f"Missing {element} in rendered HTML"
+        renderer = renderer_cls()
+        try:
+            if hasattr(renderer, "render_html_improved"):
+                html = renderer.render_html_improved(code)
+            else:
+                html = renderer.render_html(code)
+        except Exception:
+            # Skip if rendering fails (dependency issues)
+            html = None
+
+        if not html:
+            pytest.skip(f"{renderer_cls.__name__} could not render in this environment")
+
+        # Check for consistent control structure in a single scan of the HTML
+        missing = COMMON_ELEMENTS - set(_COMMON_ELEMENTS_RE.findall(html))
+        assert not missing, f"Missing {sorted(missing)} in rendered HTML"
 
 
 class TestErrorHandling:
     """Test error handling consistency and robustness"""
 
-    def test_missing_static_files_handled_gracefully(self):
+    def test_missing_static_files_handled_gracefully(self, mermaid):
         """Test behavior when static JS files are missing"""
-        renderer = MermaidRenderer()
-
-        with patch.object(renderer, "get_static_js_content", return_value=None):
-            html = renderer.render_html("graph TD\n    A --> B")
+        with patch.object(mermaid, "get_static_js_content", return_value=None):
+            html = mermaid.render_html("graph TD\n    A --> B")
 
             assert html is not None
             assert "error" in html.lower()
             assert "Rendering Error" in html or "<!DOCTYPE html>" in html
 
-    def test_missing_template_handled_gracefully(self):
+    def test_missing_template_handled_gracefully(self, mermaid):
         """Test behavior when template files are missing"""
-        renderer = MermaidRenderer()
-
-        with patch.object(renderer, "get_template_content", return_value=None):
-            html = renderer.render_html("graph TD\n    A --> B")
+        with patch.object(mermaid, "get_template_content", return_value=None):
+            html = mermaid.render_html("graph TD\n    A --> B")
 
             assert html is not None
             assert "error" in html.lower()
             assert "Rendering Error" in html or "<!DOCTYPE html>" in html
 
-    def test_error_message_format_consistency(self):
+    @pytest.mark.parametrize("message", ERROR_MESSAGES)
+    def test_error_message_format_consistency(self, mermaid, message):
         """Test that all error messages follow the same format"""
-        renderer = MermaidRenderer()  # Use concrete renderer
-
-        error_messages = ["File not found", "Network error", "Template missing"]
-
-        for message in error_messages:
-            result = renderer._generate_error_html(message)
-            # Check for new template format
-            assert "error" in result.lower()
-            assert "Rendering Error" in result
-            assert f"<p>{message}</p>" in result
+        result = mermaid._generate_error_html(message)
+        # Check for new template format
+        assert "error" in result.lower()
+        assert "Rendering Error" in result
+        assert f"<p>{message}</p>" in result
 
 
 class TestNewMethodCoverage:
     """Test coverage for all new methods added during refactoring"""
 
-    def test_mermaid_generate_error_html(self):
+    def test_mermaid_generate_error_html(self, mermaid):
         """Test Mermaid renderer error HTML generation"""
-        renderer = MermaidRenderer()
-
-        result = renderer._generate_error_html("Test message")
+        result = mermaid._generate_error_html("Test message")
         # Check for new template format
         assert "error" in result.lower()
         assert "Rendering Error" in result
         assert "<p>Test message</p>" in result
 
-    def test_mermaid_generate_rendering_script(self):
+    def test_mermaid_generate_rendering_script(self, mermaid):
         """Test Mermaid rendering script generation"""
-        renderer = MermaidRenderer()
         code = "graph TD\n    A --> B"
         escaped_original = '"test"'
 
-        script = renderer._generate_mermaid_rendering_script(code, escaped_original)
+        script = mermaid._generate_mermaid_rendering_script(code, escaped_original)
 
         assert "async function renderDiagram()" in script
         assert "mermaid.initialize" in script
@@ -226,10 +212,8 @@ class TestNewMethodCoverage:
         assert code in script
         assert escaped_original in script
 
-    def test_mermaid_populate_template(self):
+    def test_mermaid_populate_template(self, mermaid):
         """Test Mermaid template population"""
-        renderer = MermaidRenderer()
-
         template = """
         <html>
         <script>{js_content}</script>
@@ -251,7 +235,7 @@ class TestNewMethodCoverage:
         </html>
         """
 
-        result = renderer._populate_mermaid_template(
+        result = mermaid._populate_mermaid_template(
             template, "mermaid_js", "panzoom_js", "clean_code", '"original"', "custom_script"
         )
 
@@ -267,73 +251,44 @@ class TestDemoScriptFunctionality:
 
     def test_demo_script_exists_and_executable(self):
         """Test that the dashboard script exists in the correct location"""
-        import os
-        from pathlib import Path
-
-        # unified_demo.py was replaced by dashboard.py
-        demo_path = Path(__file__).parent.parent / "examples" / "dashboard.py"
-
-        assert demo_path.exists()
-        assert os.access(demo_path, os.R_OK)
+        assert _DEMO_PATH.exists()
+        assert os.access(_DEMO_PATH, os.R_OK)
 
     def test_demo_script_imports(self):
-        """Test that demo script can import required modules"""
-        try:
-            import os
-            import sys
-            from pathlib import Path
-
-            sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-
-            # Import the dashboard module
-            import importlib.util
-
-            demo_path = Path(__file__).parent.parent / "examples" / "dashboard.py"
-            spec = importlib.util.spec_from_file_location("dashboard", str(demo_path))
-            demo_module = importlib.util.module_from_spec(spec)
-
-            # Dashboard uses streamlit, which we may not have in test env
-            try:
-                spec.loader.exec_module(demo_module)
-                # Should have example functions
-                assert hasattr(demo_module, "get_mermaid_examples")
-                assert callable(demo_module.get_mermaid_examples)
-            except ImportError as e:
-                if "streamlit" in str(e).lower():
-                    pytest.skip("Streamlit not available in test environment")
-                else:
-                    raise
-
-        except ImportError as e:
-            pytest.skip(f"Demo script import failed: {e}")
+        """Test that demo script defines its example functions"""
+        assert _DEMO_PATH.exists()
+
+        # Parse rather than import: the dashboard pulls in streamlit at module level
+        tree = ast.parse(_DEMO_PATH.read_text(encoding="utf-8"))
+        names = {
+            node.name
+            for node in tree.body
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        }
+        assert "get_mermaid_examples" in names
 
 
 class TestStaticAssetIntegration:
     """Test static asset loading and integration"""
 
-    def test_panzoom_library_available(self):
+    def test_panzoom_library_available(self, mermaid):
         """Test that panzoom library is available"""
-        renderer = MermaidRenderer()
-
-        panzoom_content = renderer.get_static_js_content("panzoom.min.js")
+        panzoom_content = mermaid.get_static_js_content("panzoom.min.js")
         assert panzoom_content is not None
         assert len(panzoom_content) > 0
         assert "panzoom" in panzoom_content.lower()
 
-    def test_mermaid_library_upgraded(self):
+    def test_mermaid_library_upgraded(self, mermaid):
         """Test that Mermaid library is the upgraded version"""
-        renderer = MermaidRenderer()
+        # Stat the bundled file rather than reading the whole library
+        path = mermaid.get_static_js_path("mermaid.min.js")
+        assert path.exists()
+        assert path.stat().st_size > 100000  # v11.6.0 should be substantial
 
-        mermaid_content = renderer.get_static_js_content("mermaid.min.js")
-        assert mermaid_content is not None
-        assert len(mermaid_content) > 100000  # v11.6.0 should be substantial
-
-    def test_vizjs_libraries_available(self):
+    def test_vizjs_libraries_available(self, graphviz):
         """Test that VizJS libraries are available"""
-        renderer = GraphvizRenderer()
-
-        viz_lite = renderer.get_static_js_content("viz-lite.js")
-        viz_full = renderer.get_static_js_content("viz-full.js")
+        viz_lite = graphviz.get_static_js_content("viz-lite.js")
+        viz_full = graphviz.get_static_js_content("viz-full.js")
 
         assert viz_lite is not None
         assert viz_full is not None
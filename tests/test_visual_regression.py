@@ -7,22 +7,48 @@ from pathlib import Path
 
 import pytest
 
+from tests.visual.screenshot_capture import DiagramScreenshotCapture
 from tests.visual.visual_test_runner import VisualRegressionTester
 
+BASELINES_DIR = Path(__file__).parent / "visual" / "baselines"
+EXAMPLES_DIR = Path(__file__).parent.parent / "examples"
+
+
+@pytest.fixture(scope="session")
+def capturer(baseline_paths):
+    """Screenshot capturer whose browser and example server are shared across the session"""
+    # Skip before launching a browser when there is nothing to compare against
+    if not baseline_paths:
+        pytest.skip("No baseline images found. Run: python tests/visual/baseline_generator.py")
+
+    with DiagramScreenshotCapture(server_port=8004) as capturer:
+        capturer.start_local_server(EXAMPLES_DIR)
+        try:
+            yield capturer
+        finally:
+            capturer.stop_local_server()
+
+
+@pytest.fixture(scope="session")
+def visual_tester(capturer):
+    """Visual regression tester using the session's shared capturer"""
+    with VisualRegressionTester(similarity_threshold=0.95, capturer=capturer) as tester:
+        yield tester
+
+
+@pytest.fixture(scope="session")
+def baseline_paths():
+    """Baseline images, enumerated once per session"""
+    return list(BASELINES_DIR.glob("*/*.png"))
+
 
 class TestVisualRegression:
     """Visual regression tests for diagram rendering"""
 
     @pytest.fixture(scope="class")
-    def visual_tester(self):
-        """Create visual regression tester instance"""
-        return VisualRegressionTester(similarity_threshold=0.95)
-
-    @pytest.fixture(scope="class")
-    def baselines_exist(self):
+    def baselines_exist(self, baseline_paths):
         """Check if baseline images exist"""
-        baselines_dir = Path(__file__).parent / "visual" / "baselines"
-        return any(baselines_dir.glob("*/*.png"))
+        return bool(baseline_paths)
 
     @pytest.mark.visual
     def test_visual_regression_mermaid(self, visual_tester, baselines_exist):
@@ -75,16 +101,14 @@ class TestVisualRegression:
             pytest.fail("Visual regression failures:\\n" + "\\n".join(failed_details))
 
     @pytest.mark.visual
-    def test_baseline_coverage(self):
+    def test_baseline_coverage(self, baseline_paths):
         """Test that we have baseline images for all working examples"""
         # Check that baseline directory exists and contains images
-        baselines_dir = Path(__file__).parent / "visual" / "baselines"
-
-        if not baselines_dir.exists():
+        if not BASELINES_DIR.exists():
             pytest.skip("No baselines directory")
 
         # Count baseline images
-        baseline_count = len(list(baselines_dir.glob("*/*.png")))
+        baseline_count = len(baseline_paths)
 
         # We should have at least some baselines
         assert baseline_count > 20, f"Expected at least 20 baseline images, found {baseline_count}"
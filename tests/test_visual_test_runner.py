@@ -0,0 +1,191 @@
+"""
+Tests for the visual regression test runner's capture orchestration
+"""
+
+import json
+import sys
+import types
+from datetime import datetime
+
+import pytest
+
+from tests.visual import visual_test_runner
+from tests.visual.screenshot_capture import DiagramScreenshotCapture
+from tests.visual.visual_test_runner import VisualRegressionTester
+
+
+@pytest.fixture
+def make_tester(tmp_path):
+    """Build a VisualRegressionTester whose examples and artifacts live under tmp_path"""
+
+    def make(capturer):
+        tester = VisualRegressionTester(capturer=capturer)
+        tester.examples_dir = tmp_path / "examples"
+        tester.artifacts_dir = tmp_path / "artifacts"
+        tester.current_dir = tester.artifacts_dir / "current"
+        tester.diff_dir = tester.artifacts_dir / "diffs"
+        tester.capture_hashes_path = tester.artifacts_dir / "hashes.json"
+        tester.examples_dir.mkdir()
+        tester.current_dir.mkdir(parents=True)
+        return tester
+
+    return make
+
+
+class StubCapturer:
+    """Capturer that writes placeholder screenshots and records what it captured"""
+
+    server_running = True
+
+    def __init__(self, version="120.0.6099.28", not_ready=()):
+        self.version = version
+        self.not_ready = set(not_ready)
+        self.captured = []
+
+    def browser_version(self):
+        return self.version
+
+    def capture_all_examples(self, examples_by_type, output_dir, on_captured=None):
+        results = {}
+        for diagram_type, examples in examples_by_type.items():
+            type_results = results[diagram_type] = {"success": [], "failed": [], "not_ready": []}
+            for filename in examples:
+                path = output_dir / diagram_type / filename.replace(".html", ".png")
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(b"png")
+                self.captured.append(filename)
+                type_results["success"].append(filename)
+                if filename in self.not_ready:
+                    type_results["not_ready"].append(filename)
+                if on_captured is not None:
+                    on_captured(diagram_type, filename, path)
+        return results
+
+
+EXAMPLES = {"mermaid": {"flowchart.html": {}, "sequence.html": {}}}
+HTML_HASHES = {"flowchart.html": "a" * 64, "sequence.html": "b" * 64}
+
+
+@pytest.fixture
+def failing_playwright(monkeypatch):
+    """Stub playwright.async_api so that launching Chromium fails"""
+
+    class Chromium:
+        async def launch(self):
+            raise RuntimeError("Executable doesn't exist at /ms-playwright/chromium")
+
+    class Playwright:
+        chromium = Chromium()
+
+        async def stop(self):
+            pass
+
+    class Starter:
+        async def start(self):
+            return Playwright()
+
+    async_api = types.ModuleType("playwright.async_api")
+    async_api.async_playwright = Starter
+    monkeypatch.setitem(sys.modules, "playwright", types.ModuleType("playwright"))
+    monkeypatch.setitem(sys.modules, "playwright.async_api", async_api)
+
+
+class TestCaptureFailures:
+    """Test how capture failures surface from run_visual_tests"""
+
+    def test_browser_launch_failure_returns_error(self, make_tester, failing_playwright):
+        """Test that a browser that cannot launch is reported, not raised"""
+        capturer = DiagramScreenshotCapture(server_port=8140)
+        tester = make_tester(capturer)
+        try:
+            results = tester.run_visual_tests(regenerate_examples=False)
+        finally:
+            capturer.close()
+
+        assert results == {"error": "Failed to capture screenshots"}
+
+
+class TestScreenshotReuse:
+    """Test reuse of current screenshots whose example HTML is unchanged"""
+
+    def test_matching_hash_skips_capture(self, make_tester):
+        """Test that a second run with unchanged HTML reuses every screenshot"""
+        capturer = StubCapturer()
+        tester = make_tester(capturer)
+        assert tester._capture_current_screenshots(EXAMPLES, HTML_HASHES)
+        assert capturer.captured == ["flowchart.html", "sequence.html"]
+
+        capturer.captured.clear()
+        ready = []
+        assert tester._capture_current_screenshots(
+            EXAMPLES, HTML_HASHES, lambda diagram_type, filename, path: ready.append(filename)
+        )
+        assert capturer.captured == []
+        assert ready == ["flowchart.html", "sequence.html"]
+
+    def test_changed_hash_recaptures(self, make_tester):
+        """Test that only examples whose HTML changed are captured again"""
+        capturer = StubCapturer()
+        tester = make_tester(capturer)
+        tester._capture_current_screenshots(EXAMPLES, HTML_HASHES)
+
+        capturer.captured.clear()
+        tester._capture_current_screenshots(EXAMPLES, {**HTML_HASHES, "sequence.html": "c" * 64})
+        assert capturer.captured == ["sequence.html"]
+
+    def test_timed_out_capture_is_not_recorded(self, make_tester):
+        """Test that a screenshot taken without the ready signal is captured again next run"""
+        capturer = StubCapturer(not_ready={"sequence.html"})
+        tester = make_tester(capturer)
+        tester._capture_current_screenshots(EXAMPLES, HTML_HASHES)
+
+        recorded = json.loads(tester.capture_hashes_path.read_text())
+        assert recorded["html_hashes"] == {"flowchart.html": HTML_HASHES["flowchart.html"]}
+
+        capturer.captured.clear()
+        tester._capture_current_screenshots(EXAMPLES, HTML_HASHES)
+        assert capturer.captured == ["sequence.html"]
+
+    def test_browser_version_change_recaptures(self, make_tester):
+        """Test that screenshots from another browser version are not reused"""
+        capturer = StubCapturer()
+        tester = make_tester(capturer)
+        tester._capture_current_screenshots(EXAMPLES, HTML_HASHES)
+
+        capturer.version = "121.0.6167.57"
+        capturer.captured.clear()
+        tester._capture_current_screenshots(EXAMPLES, HTML_HASHES)
+        assert capturer.captured == ["flowchart.html", "sequence.html"]
+
+
+class TestReportFiles:
+    """Test where run reports are written"""
+
+    def test_reports_in_same_second_do_not_collide(self, make_tester, monkeypatch):
+        """Test that two reports generated within one second are both kept"""
+        frozen = datetime(2026, 1, 2, 3, 4, 5)
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return frozen
+
+        monkeypatch.setattr(visual_test_runner, "datetime", FrozenDatetime)
+        tester = make_tester(StubCapturer())
+        comparison_results = {
+            "passed": ["flowchart.html"],
+            "failed": [],
+            "missing_baseline": [],
+            "comparison_details": {},
+        }
+
+        tester._generate_test_report(comparison_results)
+        tester._generate_test_report(comparison_results)
+
+        reports = sorted(path.name for path in tester.artifacts_dir.glob("visual_test_report_*"))
+        assert reports == [
+            "visual_test_report_20260102T030405.json",
+            "visual_test_report_20260102T030405.txt",
+            "visual_test_report_20260102T030405_1.json",
+            "visual_test_report_20260102T030405_1.txt",
+        ]
@@ -5,42 +5,56 @@ Tests the REST API endpoints, request/response handling,
 and integration with the diagram rendering system.
 """
 
+import functools
+import importlib.util
+from pathlib import Path
+
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
 
+# Run every test on one session-wide event loop instead of a loop per request
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+WEBAPP_PATH = Path(__file__).parent.parent / "examples" / "webapp.py"
 
-class TestWebAppAPI:
-    """Test FastAPI web application endpoints"""
 
-    @pytest.fixture
-    def client(self):
-        """Create test client for FastAPI app"""
-        try:
-            import sys
-            from pathlib import Path
+@functools.cache
+def _load_webapp():
+    """Import examples/webapp.py once per session"""
+    spec = importlib.util.spec_from_file_location("webapp", WEBAPP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
 
-            # Add examples directory to path
-            examples_dir = Path(__file__).parent.parent / "examples"
-            sys.path.insert(0, str(examples_dir))
 
-            from webapp import app
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client():
+    """Async test client calling the FastAPI app directly over ASGI, shared by all tests"""
+    try:
+        app = _load_webapp().app
+    except ImportError:
+        pytest.skip("FastAPI or webapp dependencies not available")
 
-            return TestClient(app)
-        except ImportError:
-            pytest.skip("FastAPI or webapp dependencies not available")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+class TestWebAppAPI:
+    """Test FastAPI web application endpoints"""
 
-    def test_health_endpoint(self, client):
+    async def test_health_endpoint(self, client):
         """Test health check endpoint"""
-        response = client.get("/health")
+        response = await client.get("/health")
 
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "healthy"
         assert data["service"] == "diagram-renderer"
 
-    def test_main_page_endpoint(self, client):
+    async def test_main_page_endpoint(self, client):
         """Test main page returns HTML"""
-        response = client.get("/")
+        response = await client.get("/")
 
         assert response.status_code == 200
         assert "text/html" in response.headers["content-type"]
@@ -51,7 +65,7 @@ class TestWebAppAPI:
         assert "diagramCode" in html  # Editor textarea
         assert "renderBtn" in html  # Render button
 
-    def test_render_api_mermaid(self, client):
+    async def test_render_api_mermaid(self, client):
         """Test rendering Mermaid diagram via API"""
         request_data = {
             "code": "graph TD\n    A[Start] --> B[End]",
@@ -59,7 +73,7 @@ class TestWebAppAPI:
             "format": "html",
         }
 
-        response = client.post("/api/render", json=request_data)
+        response = await client.post("/api/render", json=request_data)
 
         assert response.status_code == 200
         data = response.json()
@@ -74,11 +88,11 @@ class TestWebAppAPI:
         # Check HTML content includes charset
         assert '<meta charset="utf-8">' in data["content"]
 
-    def test_render_api_plantuml(self, client):
+    async def test_render_api_plantuml(self, client):
         """Test rendering PlantUML diagram via API"""
         request_data = {"code": "@startuml\nA -> B\n@enduml", "type": "plantuml", "format": "html"}
 
-        response = client.post("/api/render", json=request_data)
+        response = await client.post("/api/render", json=request_data)
 
         assert response.status_code == 200
         data = response.json()
@@ -88,11 +102,11 @@ class TestWebAppAPI:
         assert data["format"] == "html"
         assert data["content"] is not None
 
-    def test_render_api_graphviz(self, client):
+    async def test_render_api_graphviz(self, client):
         """Test rendering Graphviz diagram via API"""
         request_data = {"code": "digraph G {\n    A -> B;\n}", "type": "graphviz", "format": "html"}
 
-        response = client.post("/api/render", json=request_data)
+        response = await client.post("/api/render", json=request_data)
 
         assert response.status_code == 200
         data = response.json()
@@ -102,26 +116,27 @@ class TestWebAppAPI:
         assert data["format"] == "html"
         assert data["content"] is not None
 
-    def test_render_api_auto_detection(self, client):
-        """Test auto-detection of diagram type"""
-        test_cases = [
+    @pytest.mark.parametrize(
+        "code,expected_type",
+        [
             ("graph TD; A --> B", "mermaid"),
             ("@startuml\nA -> B\n@enduml", "plantuml"),
             ("digraph G { A -> B; }", "graphviz"),
-        ]
-
-        for code, expected_type in test_cases:
-            request_data = {"code": code, "type": "auto", "format": "html"}
+        ],
+    )
+    async def test_render_api_auto_detection(self, client, code, expected_type):
+        """Test auto-detection of diagram type"""
+        request_data = {"code": code, "type": "auto", "format": "html"}
 
-            response = client.post("/api/render", json=request_data)
+        response = await client.post("/api/render", json=request_data)
 
-            assert response.status_code == 200
-            data = response.json()
+        assert response.status_code == 200
+        data = response.json()
 
-            assert data["success"] is True
-            assert data["diagram_type"] == expected_type
+        assert data["success"] is True
+        assert data["diagram_type"] == expected_type
 
-    def test_render_api_invalid_code(self, client):
+    async def test_render_api_invalid_code(self, client):
         """Test API response to invalid diagram code"""
         request_data = {
             "code": "invalid diagram syntax that makes no sense",
@@ -129,7 +144,7 @@ class TestWebAppAPI:
             "format": "html",
         }
 
-        response = client.post("/api/render", json=request_data)
+        response = await client.post("/api/render", json=request_data)
 
         # Should still return 200 but with success=false or valid fallback
         assert response.status_code == 200
@@ -139,26 +154,26 @@ class TestWebAppAPI:
         assert "success" in data
         assert "diagram_type" in data
 
-    def test_render_api_missing_fields(self, client):
-        """Test API validation for missing required fields"""
-        # Missing code field
-        response = client.post("/api/render", json={"type": "mermaid"})
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            pytest.param({"type": "mermaid"}, id="missing-code"),
+            pytest.param({}, id="empty-request"),
+            pytest.param(
+                {"code": "graph TD; A --> B", "type": "invalid_type", "format": "html"},
+                id="invalid-type",
+            ),
+            pytest.param({"code": "graph TD; A-->B", "bogus": 1}, id="unknown-field"),
+        ],
+    )
+    async def test_render_api_validation_errors(self, client, payload):
+        """Test API validation for missing or unknown fields and invalid diagram types"""
+        response = await client.post("/api/render", json=payload)
         assert response.status_code == 422  # Validation error
 
-        # Empty request
-        response = client.post("/api/render", json={})
-        assert response.status_code == 422  # Validation error
-
-    def test_render_api_invalid_type(self, client):
-        """Test API response to invalid diagram type"""
-        request_data = {"code": "graph TD; A --> B", "type": "invalid_type", "format": "html"}
-
-        response = client.post("/api/render", json=request_data)
-        assert response.status_code == 422  # Validation error
-
-    def test_examples_endpoint(self, client):
+    async def test_examples_endpoint(self, client):
         """Test examples API endpoint"""
-        response = client.get("/api/examples")
+        response = await client.get("/api/examples")
 
         assert response.status_code == 200
         data = response.json()
@@ -173,17 +188,17 @@ class TestWebAppAPI:
         assert len(data["plantuml"]) > 0
         assert len(data["graphviz"]) > 0
 
-    def test_cors_headers(self, client):
+    async def test_cors_headers(self, client):
         """Test that CORS headers are handled properly"""
-        response = client.get("/health")
+        response = await client.get("/health")
 
         # Basic check - in production you might want specific CORS headers
         assert response.status_code == 200
 
-    def test_api_content_types(self, client):
+    async def test_api_content_types(self, client):
         """Test API content type handling"""
         # JSON request
-        response = client.post(
+        response = await client.post(
             "/api/render", json={"code": "graph TD; A --> B", "type": "mermaid", "format": "html"}
         )
 
@@ -194,28 +209,11 @@ class TestWebAppAPI:
 class TestWebAppIntegration:
     """Integration tests for web app with diagram renderer"""
 
-    @pytest.fixture
-    def client(self):
-        """Create test client for FastAPI app"""
-        try:
-            import sys
-            from pathlib import Path
-
-            # Add examples directory to path
-            examples_dir = Path(__file__).parent.parent / "examples"
-            sys.path.insert(0, str(examples_dir))
-
-            from webapp import app
-
-            return TestClient(app)
-        except ImportError:
-            pytest.skip("FastAPI or webapp dependencies not available")
-
-    def test_webapp_uses_latest_renderer(self, client):
+    async def test_webapp_uses_latest_renderer(self, client):
         """Test that webapp uses the latest DiagramRenderer features"""
         request_data = {"code": "graph TD; A --> B", "type": "mermaid", "format": "html"}
 
-        response = client.post("/api/render", json=request_data)
+        response = await client.post("/api/render", json=request_data)
         data = response.json()
 
         # Should include latest features like charset and Unicode symbols
@@ -229,26 +227,25 @@ class TestWebAppIntegration:
         assert "⧉" in html_content  # Copy
         assert "↻" in html_content  # Reset
 
-    def test_webapp_error_handling(self, client):
+    @pytest.mark.parametrize(
+        "code",
+        [
+            pytest.param("", id="empty"),
+            pytest.param(" ", id="whitespace"),
+            pytest.param("a" * 10000, id="very-long"),
+            pytest.param("特殊字符测试", id="unicode"),
+        ],
+    )
+    async def test_webapp_error_handling(self, client, code):
         """Test webapp error handling and logging"""
         # This tests that the webapp handles errors gracefully
         # without crashing the server
+        request_data = {"code": code, "type": "auto", "format": "html"}
 
-        # Try various edge cases
-        edge_cases = [
-            "",  # Empty string
-            " ",  # Whitespace only
-            "a" * 10000,  # Very long string
-            "特殊字符测试",  # Unicode characters
-        ]
-
-        for code in edge_cases:
-            request_data = {"code": code, "type": "auto", "format": "html"}
+        response = await client.post("/api/render", json=request_data)
 
-            response = client.post("/api/render", json=request_data)
-
-            # Should always return a valid response (even if error)
-            assert response.status_code == 200
-            data = response.json()
-            assert "success" in data
-            assert "diagram_type" in data
+        # Should always return a valid response (even if error)
+        assert response.status_code == 200
+        data = response.json()
+        assert "success" in data
+        assert "diagram_type" in data
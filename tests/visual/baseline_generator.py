@@ -5,6 +5,8 @@ Captures reference screenshots of all working diagram examples.
 """
 
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 # Add the parent directory to the path to import diagram_generators
@@ -34,6 +36,30 @@ def filter_working_examples(examples: dict, results: dict) -> dict:
     return working_examples
 
 
+def _regen_type(diagram_type: str, examples: dict, examples_dir: Path) -> list:
+    """Render one diagram type's examples to HTML files (runs in a worker process)"""
+    from diagram_renderer import DiagramRenderer
+
+    renderer = DiagramRenderer()
+    type_dir = examples_dir / diagram_type
+    type_dir.mkdir(exist_ok=True, parents=True)
+
+    generated = []
+    for filename, diagram_info in examples.items():
+        try:
+            html_content = renderer.render_diagram_auto(diagram_info["code"])
+            if html_content:
+                # Save HTML file, encoding once instead of through a text-mode stream
+                html_path = examples_dir / filename
+                html_path.write_bytes(html_content.encode("utf-8"))
+                generated.append(filename)
+                print(f"  ✅ Generated {filename}")
+        except Exception as e:
+            print(f"  ❌ Failed to generate {filename}: {e}")
+
+    return generated
+
+
 def generate_baselines():
     """Generate baseline reference images for all working examples"""
 
@@ -49,47 +75,31 @@ def generate_baselines():
 
     # Generate HTML files for all examples
     print("🔄 Generating HTML files for examples...")
-    from diagram_renderer import DiagramRenderer
-
-    renderer = DiagramRenderer()
-
-    # Track which examples work
-    all_results = {
-        "mermaid": {"success": []},
-        "plantuml": {"success": []},
-        "graphviz": {"success": []},
+    all_examples = {
+        "mermaid": get_mermaid_examples(),
+        "plantuml": get_plantuml_examples(),
+        "graphviz": get_graphviz_examples(),
     }
 
-    for diagram_type, get_examples_func in [
-        ("mermaid", get_mermaid_examples),
-        ("plantuml", get_plantuml_examples),
-        ("graphviz", get_graphviz_examples),
-    ]:
-        examples = get_examples_func()
-        type_dir = examples_dir / diagram_type
-        type_dir.mkdir(exist_ok=True, parents=True)
-
-        for filename, diagram_info in examples.items():
-            try:
-                # Generate HTML
-                html_content = renderer.render_diagram_auto(diagram_info["code"])
-                if html_content:
-                    # Save HTML file
-                    html_path = examples_dir / filename
-                    with open(html_path, "w", encoding="utf-8") as f:
-                        f.write(html_content)
-                    all_results[diagram_type]["success"].append(filename)
-                    print(f"  ✅ Generated {filename}")
-            except Exception as e:
-                print(f"  ❌ Failed to generate {filename}: {e}")
+    # Diagram types render independently, so regenerate each in its own process
+    with ProcessPoolExecutor(max_workers=len(all_examples)) as executor:
+        generated = executor.map(
+            _regen_type, all_examples.keys(), all_examples.values(), repeat(examples_dir)
+        )
+        # Track which examples work
+        all_results = {
+            diagram_type: {"success": filenames}
+            for diagram_type, filenames in zip(all_examples, generated)
+        }
 
     # Get working examples only
     examples_by_type = {
-        "mermaid": filter_working_examples(get_mermaid_examples(), all_results["mermaid"]),
-        "plantuml": filter_working_examples(get_plantuml_examples(), all_results["plantuml"]),
-        "graphviz": filter_working_examples(get_graphviz_examples(), all_results["graphviz"]),
+        diagram_type: filter_working_examples(examples, all_results[diagram_type])
+        for diagram_type, examples in all_examples.items()
     }
 
+    total_examples = sum(len(examples) for examples in examples_by_type.values())
+
     print("\n📊 Examples to capture:")
     for diagram_type, examples in examples_by_type.items():
         print(f"  {diagram_type}: {len(examples)} working examples")
@@ -103,14 +113,14 @@ def generate_baselines():
 
     try:
         # Capture all screenshots to baselines directory
-        results = capturer.capture_all_examples(examples_by_type, baselines_dir)
+        with capturer:
+            results = capturer.capture_all_examples(examples_by_type, baselines_dir)
 
         # Summary
         total_captured = sum(len(r["success"]) for r in results.values())
-        total_examples = sum(len(examples) for examples in examples_by_type.items())
 
         print("\n🎉 Baseline Generation Complete!")
-        print(f"📸 Captured: {total_captured} reference images")
+        print(f"📸 Captured: {total_captured}/{total_examples} reference images")
         print(f"📁 Location: {baselines_dir}")
 
         if total_captured > 0:
@@ -5,9 +5,89 @@ Compares current screenshots against baseline images to detect changes.
 """
 
 import hashlib
+import mmap
+import multiprocessing
+import os
+import struct
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from typing import Optional
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Chunks whose contents determine the decoded pixels
+_PNG_PIXEL_CHUNKS = {b"IHDR", b"PLTE", b"tRNS", b"IDAT"}
+
+
+def _new_hasher():
+    """Return a 64-bit XXH3 hasher when available, falling back to hashlib's BLAKE2b"""
+    if xxhash is not None:
+        return xxhash.xxh3_64()
+    return hashlib.blake2b(digest_size=8)
+
+
+def _fingerprint_file(path: Path, size: int) -> int:
+    """Fingerprint file contents as a 64-bit integer"""
+    hasher = _new_hasher()
+    # mmap cannot map empty files, which hash as empty input
+    if size:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            hasher.update(mm)
+    return int.from_bytes(hasher.digest(), "big")
+
+
+def _read_tail(path: Path, size: int, length: int = 16) -> bytes:
+    """Read the last bytes of a file as a cheap pre-hash fingerprint"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(size - length, 0))
+            return f.read(length)
+    except OSError:
+        return b""
+
+
+def _png_image_crcs(path: Path) -> Optional[tuple[tuple[int, int], list[bytes]]]:
+    """
+    Walk the PNG chunk list without decompressing anything.
+
+    Returns the (width, height) from IHDR and the stored CRCs of the chunks that
+    determine the pixels, or None if the file is not a complete PNG. Matching CRC
+    lists mean the compressed image data is the same, so decoding can be skipped.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(8) != PNG_SIGNATURE:
+                return None
+
+            size = None
+            crcs = []
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None  # Truncated before IEND
+                length, chunk_type = struct.unpack(">I4s", header)
+
+                if chunk_type == b"IHDR":
+                    size = struct.unpack(">II", f.read(length)[:8])
+                else:
+                    f.seek(length, os.SEEK_CUR)
+
+                crc = f.read(4)
+                if chunk_type in _PNG_PIXEL_CHUNKS:
+                    crcs.append(crc)
+                if chunk_type == b"IEND":
+                    break
+    except (OSError, struct.error):
+        return None
+
+    return (size, crcs) if size else None
+
 
 class ImageComparator:
     """Compares images for visual regression testing"""
@@ -21,20 +101,31 @@ class ImageComparator:
         """
         self.similarity_threshold = similarity_threshold
 
-    def calculate_image_hash(self, image_path: Path) -> Optional[str]:
-        """Calculate MD5 hash of image file for quick comparison"""
+    def calculate_image_fingerprint(self, image_path: Path) -> Optional[int]:
+        """Calculate a non-cryptographic content fingerprint of an image file for equality checks"""
         try:
-            with open(image_path, "rb") as f:
-                return hashlib.md5(f.read()).hexdigest()
+            return _fingerprint_file(image_path, image_path.stat().st_size)
         except Exception as e:
-            print(f"❌ Error calculating hash for {image_path}: {e}")
+            print(f"❌ Error calculating fingerprint for {image_path}: {e}")
             return None
 
     def images_identical_by_hash(self, image1_path: Path, image2_path: Path) -> bool:
-        """Quick check if images are identical using MD5 hash"""
-        hash1 = self.calculate_image_hash(image1_path)
-        hash2 = self.calculate_image_hash(image2_path)
-        return hash1 is not None and hash1 == hash2
+        """Quick check if images are identical using content hash"""
+        # Files of different sizes cannot be byte-identical, so skip reading them
+        try:
+            size = image1_path.stat().st_size
+            if size != image2_path.stat().st_size:
+                return False
+        except OSError:
+            return False
+
+        # A PNG ends with the IEND chunk, preceded by the CRC of the last data chunk
+        if _read_tail(image1_path, size) != _read_tail(image2_path, size):
+            return False
+
+        fingerprint1 = self.calculate_image_fingerprint(image1_path)
+        fingerprint2 = self.calculate_image_fingerprint(image2_path)
+        return fingerprint1 is not None and fingerprint1 == fingerprint2
 
     def compare_images_pillow(
         self, baseline_path: Path, current_path: Path, diff_output_path: Optional[Path] = None
@@ -43,33 +134,55 @@ class ImageComparator:
         Compare images using Pillow (basic comparison).
         Returns comparison results with similarity score.
         """
+        # Identical compressed image data decodes to identical pixels
+        baseline_png = _png_image_crcs(baseline_path)
+        if baseline_png is not None and baseline_png == _png_image_crcs(current_path):
+            size = baseline_png[0]
+            return {
+                "method": "png_crc",
+                "similarity": 1.0,
+                "different_pixels": 0,
+                "total_pixels": size[0] * size[1],
+                "passed": True,
+                "baseline_size": size,
+                "current_size": size,
+            }
+
         try:
             import numpy as np
             from PIL import Image, ImageDraw, ImageFont
 
-            # Load images
-            baseline = Image.open(baseline_path).convert("RGB")
-            current = Image.open(current_path).convert("RGB")
+            # Load images, converting only when not already RGB
+            baseline = Image.open(baseline_path)
+            if baseline.mode != "RGB":
+                baseline = baseline.convert("RGB")
+            current = Image.open(current_path)
+            if current.mode != "RGB":
+                current = current.convert("RGB")
 
             # Resize to same dimensions if needed
             if baseline.size != current.size:
                 current = current.resize(baseline.size, Image.Resampling.LANCZOS)
 
-            # Convert to numpy arrays for comparison
-            baseline_array = np.array(baseline)
-            current_array = np.array(current)
+            # View the decoded pixels as numpy arrays without an extra copy
+            baseline_array = np.asarray(baseline, dtype=np.uint8)
+            current_array = np.asarray(current, dtype=np.uint8)
 
-            # Calculate pixel differences
-            diff_array = np.abs(baseline_array.astype(int) - current_array.astype(int))
+            # Calculate pixel differences as |a - b| without widening out of uint8
+            diff_array = np.maximum(baseline_array, current_array)
+            diff_array -= np.minimum(baseline_array, current_array)
 
-            # Calculate similarity metrics
-            total_pixels = baseline_array.size
-            different_pixels = np.count_nonzero(diff_array)
+            # Collapse channels to the largest per-pixel difference (H x W)
+            diff_mask = diff_array.max(axis=2)
+
+            # Calculate similarity metrics over pixels rather than channel values
+            total_pixels = diff_mask.size
+            different_pixels = np.count_nonzero(diff_mask)
             similarity = 1.0 - (different_pixels / total_pixels)
 
             # Generate visual diff if requested
             if diff_output_path:
-                self._generate_visual_diff(baseline, current, diff_array, diff_output_path)
+                self._generate_visual_diff(baseline, current, diff_mask, diff_output_path)
 
             return {
                 "similarity": float(similarity),  # Convert numpy float to Python float
@@ -89,7 +202,7 @@ class ImageComparator:
             print(f"❌ Image comparison failed: {e}")
             return {"error": str(e)}
 
-    def _generate_visual_diff(self, baseline, current, diff_array, output_path: Path):
+    def _generate_visual_diff(self, baseline, current, diff_mask, output_path: Path):
         """Generate visual diff image highlighting differences"""
         try:
             import numpy as np
@@ -98,15 +211,14 @@ class ImageComparator:
             # Create diff visualization
             diff_threshold = 30  # Minimum difference to highlight
 
-            # Create diff image (red highlights where images differ)
-            diff_highlight = np.zeros_like(diff_array)
-            significant_diffs = np.any(diff_array > diff_threshold, axis=2)
-            diff_highlight[significant_diffs] = [255, 0, 0]  # Red for differences
+            significant_diffs = diff_mask > diff_threshold
 
-            # Blend diff highlights with current image
-            current_array = np.array(current)
-            alpha = 0.3
-            blended = current_array * (1 - alpha) + diff_highlight * alpha
+            # Blend 30% red over the current image where images differ, in integer
+            # tenths (uint16 holds 255 * 10) rather than promoting every pixel to float64
+            blended = np.array(current, dtype=np.uint16)
+            blended *= 7
+            blended[..., 0][significant_diffs] += 255 * 3
+            blended //= 10
 
             # Save diff image
             diff_image = Image.fromarray(blended.astype(np.uint8))
@@ -115,15 +227,92 @@ class ImageComparator:
         except Exception as e:
             print(f"⚠️ Could not generate visual diff: {e}")
 
+    @staticmethod
+    def process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+        """
+        Create a process pool for comparisons that is safe to start from a threaded process.
+
+        Capture runs an HTTP server thread, worker threads and the Playwright driver,
+        and forking a multithreaded process can deadlock the child, so workers are
+        started by a forkserver (or spawned where that is unavailable).
+        """
+        method = (
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        )
+        return ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context(method)
+        )
+
+    def start_comparison(
+        self,
+        executor: Executor,
+        filename: str,
+        baseline_dir: Path,
+        current_dir: Path,
+        diff_dir: Path,
+    ) -> Future:
+        """Submit the comparison of one example's screenshot to an executor"""
+        screenshot_name = filename.replace(".html", ".png")
+        try:
+            return executor.submit(
+                _compare_one,
+                filename,
+                baseline_dir / screenshot_name,
+                current_dir / screenshot_name,
+                diff_dir / f"diff_{screenshot_name}",
+                self.similarity_threshold,
+            )
+        except BrokenProcessPool as e:
+            # Leave the comparison to compare_diagram_examples, which retries it in-process
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    def start_batch(
+        self,
+        executor: Executor,
+        baseline_dir: Path,
+        current_dir: Path,
+        diff_dir: Path,
+        filenames,
+        pending: dict,
+    ) -> dict:
+        """
+        Submit comparisons for every example that has both screenshots and isn't in pending.
+
+        The new futures are added to pending, which is returned for chaining.
+        """
+        for filename in filenames:
+            if filename in pending:
+                continue
+            screenshot_name = filename.replace(".html", ".png")
+            if (baseline_dir / screenshot_name).exists() and (
+                current_dir / screenshot_name
+            ).exists():
+                pending[filename] = self.start_comparison(
+                    executor, filename, baseline_dir, current_dir, diff_dir
+                )
+        return pending
+
     def compare_diagram_examples(
-        self, baseline_dir: Path, current_dir: Path, diff_dir: Path, examples: dict
+        self,
+        baseline_dir: Path,
+        current_dir: Path,
+        diff_dir: Path,
+        examples: dict,
+        pending: Optional[dict] = None,
     ) -> dict:
         """
         Compare all examples of a diagram type against baselines.
 
+        Args:
+            pending: Optional map of filename to a Future from start_comparison for
+                comparisons already running, e.g. started while capture was ongoing
+
         Returns:
             Dict with comparison results for each example
         """
+        pending = pending or {}
         results = {
             "passed": [],
             "failed": [],
@@ -132,6 +321,8 @@ class ImageComparator:
             "comparison_details": {},
         }
 
+        jobs = []
+        started = {}
         for filename, diagram_info in examples.items():
             screenshot_name = filename.replace(".html", ".png")
             baseline_path = baseline_dir / screenshot_name
@@ -148,22 +339,46 @@ class ImageComparator:
                 print(f"⚠️ No current screenshot for {screenshot_name}")
                 continue
 
-            # Quick hash comparison first
-            if self.images_identical_by_hash(baseline_path, current_path):
-                results["passed"].append(filename)
-                results["comparison_details"][filename] = {
-                    "method": "hash",
-                    "similarity": 1.0,
-                    "identical": True,
-                }
-                print(f"✅ {screenshot_name} - Identical")
+            job = (filename, baseline_path, current_path, diff_path, self.similarity_threshold)
+            if filename in pending:
+                started[filename] = (pending[filename], job)
+            else:
+                jobs.append(job)
+
+        outcomes = {}
+        serial = []
+        if jobs:
+            # Each comparison is independent and CPU-bound, so fan out across processes
+            workers = min(len(jobs), os.cpu_count() or 1)
+            try:
+                with self.process_pool(workers) as executor:
+                    outcomes.update(executor.map(_compare_one, *zip(*jobs), chunksize=4))
+            except BrokenProcessPool:
+                serial.extend(job for job in jobs if job[0] not in outcomes)
+
+        for filename, (future, job) in started.items():
+            try:
+                outcomes[filename] = future.result()[1]
+            except BrokenProcessPool:
+                serial.append(job)
+
+        if serial:
+            # Workers die on startup when the calling script has no __main__ guard
+            print("⚠️ Comparison workers failed to start, comparing in this process instead")
+            outcomes.update(_compare_one(*job) for job in serial)
+
+        # Report in example order once every comparison has finished
+        for filename in examples:
+            if filename not in outcomes:
                 continue
-
-            # Detailed comparison for non-identical images
-            comparison = self.compare_images_pillow(baseline_path, current_path, diff_path)
+            comparison = outcomes[filename]
+            screenshot_name = filename.replace(".html", ".png")
             results["comparison_details"][filename] = comparison
 
-            if comparison.get("passed", False):
+            if comparison.get("identical", False):
+                results["passed"].append(filename)
+                print(f"✅ {screenshot_name} - Identical")
+            elif comparison.get("passed", False):
                 results["passed"].append(filename)
                 print(f"✅ {screenshot_name} - Similar ({comparison.get('similarity', 0):.3f})")
             else:
@@ -176,6 +391,24 @@ class ImageComparator:
         return results
 
 
+def _compare_one(
+    filename: str,
+    baseline_path: Path,
+    current_path: Path,
+    diff_path: Path,
+    similarity_threshold: float,
+) -> tuple[str, dict]:
+    """Compare a single screenshot against its baseline (runs in a worker process)"""
+    comparator = ImageComparator(similarity_threshold)
+
+    # Quick hash comparison first
+    if comparator.images_identical_by_hash(baseline_path, current_path):
+        return filename, {"method": "hash", "similarity": 1.0, "identical": True}
+
+    # Detailed comparison for non-identical images
+    return filename, comparator.compare_images_pillow(baseline_path, current_path, diff_path)
+
+
 def main():
     """Standalone image comparison utility"""
     visual_dir = Path(__file__).parent
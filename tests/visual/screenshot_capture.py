@@ -5,35 +5,151 @@ Uses browser automation to capture diagram screenshots consistently.
 """
 
 import asyncio
+import atexit
+import errno
+import functools
+import os
 import signal
-import subprocess
-import sys
 import tempfile
-import time
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+
+# The unified template sets diagramReady once the diagram is rendered and pan/zoom is
+# initialized; an error message means rendering finished without a diagram
+DIAGRAM_READY_JS = """() =>
+    (typeof diagramReady !== "undefined" && diagramReady)
+    || document.querySelector("#diagram-content .error-message") !== null"""
+
+# Rendered diagrams inline their scripts, so these requests never affect the screenshot
+BLOCKED_RESOURCE_TYPES = {"font", "media", "other"}
+
+# How many successive ports to try when the requested one is already in use
+PORT_PROBE_ATTEMPTS = 20
+
+
+class _QuietRequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler that doesn't log every request to stderr"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _raise_system_exit(signum, frame):
+    """SIGTERM handler so finally blocks and atexit hooks run, as they do for Ctrl-C"""
+    raise SystemExit(128 + signum)
+
+
+# Capturers currently relying on the SIGTERM handler, and the handler it replaced
+_sigterm_users = 0
+_previous_sigterm_handler = None
+
+
+def _acquire_sigterm_handler() -> bool:
+    """
+    Turn SIGTERM (e.g. a cancelled CI job) into SystemExit unless the app handles it.
+
+    Returns whether the caller holds a reference it must pass to _release_sigterm_handler.
+    """
+    global _sigterm_users, _previous_sigterm_handler
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    if _sigterm_users == 0:
+        if signal.getsignal(signal.SIGTERM) is not signal.SIG_DFL:
+            return False
+        _previous_sigterm_handler = signal.signal(signal.SIGTERM, _raise_system_exit)
+    _sigterm_users += 1
+    return True
+
+
+def _release_sigterm_handler():
+    """Restore the previous SIGTERM handler once no capturer relies on ours"""
+    global _sigterm_users
+    _sigterm_users -= 1
+    if (
+        _sigterm_users == 0
+        and threading.current_thread() is threading.main_thread()
+        and signal.getsignal(signal.SIGTERM) is _raise_system_exit
+    ):
+        signal.signal(signal.SIGTERM, _previous_sigterm_handler)
 
 
 class DiagramScreenshotCapture:
     """Captures screenshots of diagram examples for visual regression testing"""
 
-    def __init__(self, server_port: int = 8000):
+    def __init__(self, server_port: int = 8000, max_concurrency: Optional[int] = None):
         self.server_port = server_port
-        self.base_url = f"http://localhost:{server_port}"
-        self.server_process = None
+        self.base_url = f"http://127.0.0.1:{server_port}"
+        self._server = None
+        self._server_thread = None
+        self.max_concurrency = max_concurrency or min(os.cpu_count() or 1, 8)
+        self._loop = None
+        self._playwright = None
+        self._browser = None
+        self._context_pool = None
+        self._cleanup_registered = False
+        self._holds_sigterm_handler = False
+
+    @property
+    def server_running(self) -> bool:
+        """Whether the local example server is currently serving"""
+        return self._server is not None
+
+    def _register_cleanup(self):
+        """Make sure the server and browser are released however the process exits"""
+        if not self._cleanup_registered:
+            atexit.register(self._cleanup)
+            self._holds_sigterm_handler = _acquire_sigterm_handler()
+            self._cleanup_registered = True
+
+    def _unregister_cleanup(self):
+        """Drop the exit hooks once neither the server nor the browser is running"""
+        if self._cleanup_registered and self._server is None and self._loop is None:
+            atexit.unregister(self._cleanup)
+            if self._holds_sigterm_handler:
+                _release_sigterm_handler()
+                self._holds_sigterm_handler = False
+            self._cleanup_registered = False
+
+    def _cleanup(self):
+        self.stop_local_server()
+        self.close()
+
+    def _bind_server(self, handler) -> ThreadingHTTPServer:
+        """
+        Bind the example server, moving to the next port if the requested one is taken.
+
+        ThreadingHTTPServer sets SO_REUSEADDR, so a port left in TIME_WAIT by a previous
+        run binds immediately; only ports another process is listening on are skipped.
+        """
+        for port in range(self.server_port, self.server_port + PORT_PROBE_ATTEMPTS):
+            try:
+                server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+            except OSError as e:
+                if e.errno != errno.EADDRINUSE:
+                    raise
+                continue
+            if port != self.server_port:
+                print(f"⚠️ Port {self.server_port} in use, using {port}")
+                self.server_port = port
+                self.base_url = f"http://127.0.0.1:{port}"
+            return server
+        raise OSError(errno.EADDRINUSE, f"No free port from {self.server_port}")
 
     def start_local_server(self, examples_dir: Path):
-        """Start local HTTP server for serving examples"""
+        """Start an in-process HTTP server for serving examples"""
         try:
             print(f"🚀 Starting local server on port {self.server_port}...")
-            self.server_process = subprocess.Popen(
-                [sys.executable, "-m", "http.server", str(self.server_port)],
-                cwd=examples_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+            handler = functools.partial(_QuietRequestHandler, directory=str(examples_dir))
+            # Binding happens here, so the server accepts connections as soon as this returns
+            self._server = self._bind_server(handler)
+            self._register_cleanup()
+            # A short poll interval lets shutdown() return promptly
+            self._server_thread = threading.Thread(
+                target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
             )
-            # Give server time to start
-            time.sleep(2)
+            self._server_thread.start()
             print(f"✅ Server started at {self.base_url}")
             return True
         except Exception as e:
@@ -42,52 +158,153 @@ class DiagramScreenshotCapture:
 
     def stop_local_server(self):
         """Stop the local HTTP server"""
-        if self.server_process:
+        if self._server is not None:
             try:
-                self.server_process.terminate()
-                self.server_process.wait(timeout=5)
+                self._server.shutdown()
+                self._server.server_close()
+                self._server_thread.join()
                 print("🛑 Server stopped")
-            except subprocess.TimeoutExpired:
-                self.server_process.kill()
-                print("🔪 Server forcefully killed")
             except Exception as e:
                 print(f"⚠️ Error stopping server: {e}")
+            finally:
+                self._server = None
+                self._server_thread = None
+        self._unregister_cleanup()
+
+    def _run(self, coro):
+        """Run a coroutine on the capturer's event loop, which outlives individual runs"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    async def _get_browser(self):
+        """Launch the shared Chromium browser on first use"""
+        if self._browser is None:
+            from playwright.async_api import async_playwright
+
+            self._register_cleanup()
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch()
+        return self._browser
+
+    async def _get_context_pool(self) -> asyncio.Queue:
+        """
+        Create the pool of pre-warmed browser contexts on first use.
 
-    def capture_screenshot_playwright(
-        self, url: str, output_path: Path, wait_for_diagram: bool = True
+        Each context holds one open page with the screenshot viewport, so a capture
+        rents a ready page instead of paying context setup and cold loads per shot.
+        The pool size caps how many captures run at once.
+        """
+        if self._context_pool is None:
+            browser = await self._get_browser()
+
+            async def new_context():
+                context = await browser.new_context(viewport={"width": 1200, "height": 800})
+                await context.route("**/*", self._route_request)
+                await context.new_page()
+                return context
+
+            pool = asyncio.Queue()
+            for context in await asyncio.gather(
+                *(new_context() for _ in range(self.max_concurrency))
+            ):
+                pool.put_nowait(context)
+            self._context_pool = pool
+        return self._context_pool
+
+    async def _route_request(self, route):
+        """Abort requests a self-contained diagram page doesn't need, e.g. favicons or CDNs"""
+        request = route.request
+        external = not request.url.startswith(self.base_url)
+        if external or request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def browser_version(self) -> Optional[str]:
+        """Version of the shared browser, launching it if needed; None if it can't launch"""
+        try:
+            return self._run(self._get_browser()).version
+        except Exception:
+            return None
+
+    async def _close_browser(self):
+        if self._context_pool is not None:
+            while not self._context_pool.empty():
+                await self._context_pool.get_nowait().close()
+            self._context_pool = None
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self):
+        """Close the shared browser, stop Playwright and release the event loop"""
+        if self._loop is not None and not self._loop.is_running():
+            self._run(self._close_browser())
+            self._loop.close()
+            self._loop = None
+        self._unregister_cleanup()
+
+    def __enter__(self):
+        """Launch the shared browser and its context pool for a block of captures"""
+        try:
+            self._run(self._get_context_pool())
+        except ImportError:
+            pass  # Reported per capture, where the MCP fallback is tried
+        except Exception as e:
+            # e.g. no browser binary installed; each capture retries and reports its failure
+            print(f"⚠️ Could not launch browser: {e}")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def capture_screenshot_playwright(
+        self,
+        url: str,
+        output_path: Path,
+        wait_for_diagram: bool = True,
+        not_ready: Optional[set] = None,
     ) -> bool:
         """
         Capture screenshot using Playwright (if available).
         Falls back to other methods if Playwright not installed.
+
+        If the diagram never signals it is ready, the screenshot is still taken and
+        output_path is added to not_ready.
         """
         try:
-            from playwright.sync_api import sync_playwright
-
-            with sync_playwright() as p:
-                browser = p.chromium.launch()
-                page = browser.new_page()
-
-                # Set viewport for consistent screenshots
-                page.set_viewport_size({"width": 1200, "height": 800})
+            # Rent a pre-warmed context (fixed viewport for consistent screenshots)
+            pool = await self._get_context_pool()
+            context = await pool.get()
+            try:
+                page = context.pages[0]
 
                 # Navigate to diagram
-                page.goto(url)
+                await page.goto(url)
 
                 if wait_for_diagram:
-                    # Wait for diagram to load (look for pan/zoom controls)
+                    # Wait for the page to signal the diagram has rendered, not a fixed delay
                     try:
-                        page.wait_for_selector(
-                            '[class*="zoom-controls"], [class*="control-btn"]', timeout=10000
-                        )
-                        # Additional wait for diagram rendering
-                        page.wait_for_timeout(2000)
-                    except:
-                        print(f"⚠️ Diagram controls not found for {url}")
-
-                # Take screenshot
-                page.screenshot(path=str(output_path))
-                browser.close()
-                return True
+                        await page.wait_for_function(DIAGRAM_READY_JS, timeout=10000)
+                    except Exception:
+                        print(f"⚠️ Diagram did not finish rendering for {url}")
+                        if not_ready is not None:
+                            not_ready.add(output_path)
+
+                # Take screenshot as bytes rather than writing from the capture path
+                data = await page.screenshot()
+            finally:
+                pool.put_nowait(context)
+
+            # The context is already back in the pool for the next page while this
+            # write runs on a worker thread instead of blocking the event loop
+            await asyncio.to_thread(output_path.write_bytes, data)
+            return True
 
         except ImportError:
             print("📦 Playwright not available, falling back to browser MCP...")
@@ -110,8 +327,12 @@ class DiagramScreenshotCapture:
             print(f"❌ MCP screenshot failed: {e}")
             return False
 
-    def capture_diagram_screenshot(
-        self, filename: str, output_path: Path, diagram_type: str = "unknown"
+    async def capture_diagram_screenshot(
+        self,
+        filename: str,
+        output_path: Path,
+        diagram_type: str = "unknown",
+        not_ready: Optional[set] = None,
     ) -> bool:
         """
         Capture screenshot of a specific diagram file.
@@ -121,7 +342,7 @@ class DiagramScreenshotCapture:
         print(f"📸 Capturing {diagram_type}: {filename}")
 
         # Try Playwright first
-        if self.capture_screenshot_playwright(url, output_path):
+        if await self.capture_screenshot_playwright(url, output_path, not_ready=not_ready):
             return True
 
         # Fallback to MCP
@@ -131,45 +352,99 @@ class DiagramScreenshotCapture:
         print(f"❌ Failed to capture screenshot for {filename}")
         return False
 
-    def capture_all_examples(self, examples_by_type: dict, output_dir: Path) -> dict:
+    async def run_async(
+        self,
+        examples_by_type: dict,
+        output_dir: Path,
+        on_captured: Optional[Callable[[str, str, Path], None]] = None,
+    ) -> dict:
         """
-        Capture screenshots for all diagram examples.
-
-        Args:
-            examples_by_type: Dict with keys like "mermaid", "plantuml", "graphviz"
-            output_dir: Base directory for storing screenshots
-
-        Returns:
-            Dict tracking success/failure for each diagram type
+        Capture screenshots for all diagram examples concurrently.
+
+        Page loads and render waits are I/O-bound, so captures across every diagram
+        type run together, bounded by the max_concurrency contexts in the pool.
+        on_captured(diagram_type, filename, screenshot_path) is called as soon as each
+        screenshot is written, so callers can start work on it while capture continues.
+        Successful captures taken without the diagram's ready signal are also listed
+        under "not_ready".
         """
-        results = {}
+        # Warm the pool up front so concurrent captures share one browser and pool
+        try:
+            await self._get_context_pool()
+        except ImportError:
+            pass  # Reported per capture, where the MCP fallback is tried
+        except Exception as e:
+            # e.g. no browser binary installed; no capture can succeed, so fail them all
+            print(f"❌ Could not launch browser: {e}")
+            return {
+                diagram_type: {"success": [], "failed": list(examples), "not_ready": []}
+                for diagram_type, examples in examples_by_type.items()
+            }
+
+        not_ready = set()
+
+        async def capture(filename: str, screenshot_path: Path, diagram_type: str) -> bool:
+            success = await self.capture_diagram_screenshot(
+                filename, screenshot_path, diagram_type, not_ready
+            )
+            success = success and screenshot_path.exists()
+            if success and on_captured is not None:
+                on_captured(diagram_type, filename, screenshot_path)
+            return success
 
+        jobs = []
         for diagram_type, examples in examples_by_type.items():
-            print(f"\n🎯 Capturing {diagram_type.upper()} examples...")
             type_dir = output_dir / diagram_type
             type_dir.mkdir(exist_ok=True, parents=True)
 
-            type_results = {"success": [], "failed": []}
-
-            for filename, diagram_info in examples.items():
+            for filename in examples:
                 # Create safe filename for screenshot
-                screenshot_name = filename.replace(".html", ".png")
-                screenshot_path = type_dir / screenshot_name
+                screenshot_path = type_dir / filename.replace(".html", ".png")
+                jobs.append((diagram_type, filename, screenshot_path))
 
-                success = self.capture_diagram_screenshot(filename, screenshot_path, diagram_type)
+        outcomes = await asyncio.gather(*(capture(f, path, t) for t, f, path in jobs))
 
-                if success and screenshot_path.exists():
-                    type_results["success"].append(filename)
-                    print(f"  ✅ {screenshot_name}")
-                else:
-                    type_results["failed"].append(filename)
-                    print(f"  ❌ {screenshot_name}")
+        # Summarize in example order once every capture has finished
+        results = {
+            diagram_type: {"success": [], "failed": [], "not_ready": []}
+            for diagram_type in examples_by_type
+        }
+        for (diagram_type, filename, screenshot_path), success in zip(jobs, outcomes):
+            results[diagram_type]["success" if success else "failed"].append(filename)
+            if success and screenshot_path in not_ready:
+                results[diagram_type]["not_ready"].append(filename)
 
-            results[diagram_type] = type_results
+        for diagram_type, examples in examples_by_type.items():
+            type_results = results[diagram_type]
+            print(f"\n🎯 {diagram_type.upper()} examples:")
+            for filename in examples:
+                screenshot_name = filename.replace(".html", ".png")
+                mark = "✅" if filename in type_results["success"] else "❌"
+                print(f"  {mark} {screenshot_name}")
             print(f"📊 {diagram_type}: {len(type_results['success'])}/{len(examples)} captured")
 
         return results
 
+    def capture_all_examples(
+        self,
+        examples_by_type: dict,
+        output_dir: Path,
+        on_captured: Optional[Callable[[str, str, Path], None]] = None,
+    ) -> dict:
+        """
+        Capture screenshots for all diagram examples.
+
+        Args:
+            examples_by_type: Dict with keys like "mermaid", "plantuml", "graphviz"
+            output_dir: Base directory for storing screenshots
+            on_captured: Optional callback invoked with (diagram_type, filename, path)
+                for each screenshot as soon as it is captured
+
+        Returns:
+            Dict tracking success/failure for each diagram type
+        """
+        return self._run(self.run_async(examples_by_type, output_dir, on_captured))
+
 
 def main():
     """Main function for standalone screenshot capture"""
@@ -195,7 +470,8 @@ def main():
 
     if capturer.start_local_server(examples_dir):
         try:
-            results = capturer.capture_all_examples(examples_by_type, output_dir)
+            with capturer:
+                results = capturer.capture_all_examples(examples_by_type, output_dir)
 
             # Print summary
             total_success = sum(len(r["success"]) for r in results.values())
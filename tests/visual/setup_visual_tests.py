@@ -70,8 +70,8 @@ def run_initial_visual_test():
     try:
         from visual_test_runner import VisualRegressionTester
 
-        tester = VisualRegressionTester()
-        results = tester.run_visual_tests()
+        with VisualRegressionTester() as tester:
+            results = tester.run_visual_tests()
 
         if "error" not in results:
             passed = results["summary"]["passed"]
@@ -4,48 +4,111 @@ Visual regression test runner for diagram examples.
 Automates the process of capturing screenshots and comparing against baselines.
 """
 
+import functools
+import hashlib
+import itertools
 import json
+import os
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 # Add the parent directory to the path to import diagram_generators
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from examples.diagram_generators import (
-    get_graphviz_examples,
-    get_mermaid_examples,
-    get_plantuml_examples,
-)
+# Heavier imports are deferred to where they are used, so the CLI starts quickly
+# (e.g. for --help or argument errors)
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
-try:
-    from .image_comparison import ImageComparator
     from .screenshot_capture import DiagramScreenshotCapture
-except ImportError:
-    # When running directly (not as a module)
-    from image_comparison import ImageComparator
-    from screenshot_capture import DiagramScreenshotCapture
+
+
+@functools.cache
+def _load_examples() -> dict:
+    """Build the example definitions once per process; callers must not mutate them"""
+    from examples.diagram_generators import (
+        get_graphviz_examples,
+        get_mermaid_examples,
+        get_plantuml_examples,
+    )
+
+    return {
+        "mermaid": get_mermaid_examples(),
+        "plantuml": get_plantuml_examples(),
+        "graphviz": get_graphviz_examples(),
+    }
+
+
+@functools.cache
+def _get_renderer():
+    from diagram_renderer import DiagramRenderer
+
+    return DiagramRenderer()
 
 
 class VisualRegressionTester:
     """Main visual regression testing orchestrator"""
 
-    def __init__(self, similarity_threshold: float = 0.95, server_port: int = 8004):
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        server_port: int = 8004,
+        capturer: Optional["DiagramScreenshotCapture"] = None,
+    ):
+        """
+        Args:
+            capturer: Optional shared capturer, e.g. from a session fixture. Its browser
+                and server are then managed by the caller rather than by open()/close().
+        """
         self.similarity_threshold = similarity_threshold
         self.server_port = server_port
         self.visual_dir = Path(__file__).parent
+        self.examples_dir = self.visual_dir.parent.parent / "examples"
         self.baselines_dir = self.visual_dir / "baselines"
         self.artifacts_dir = self.visual_dir / "artifacts"
         self.current_dir = self.artifacts_dir / "current"
         self.diff_dir = self.artifacts_dir / "diffs"
+        self.capture_hashes_path = self.artifacts_dir / "hashes.json"
 
-        # Ensure directories exist
-        for directory in [self.current_dir, self.diff_dir]:
-            directory.mkdir(parents=True, exist_ok=True)
-
-        self.capturer = DiagramScreenshotCapture(server_port)
+        try:
+            from .image_comparison import ImageComparator
+            from .screenshot_capture import DiagramScreenshotCapture
+        except ImportError:
+            # When running directly (not as a module)
+            from image_comparison import ImageComparator
+            from screenshot_capture import DiagramScreenshotCapture
+
+        self._owns_capturer = capturer is None
+        self.capturer = capturer or DiagramScreenshotCapture(server_port)
         self.comparator = ImageComparator(similarity_threshold)
+        self._session_open = False
+
+    def open(self) -> bool:
+        """Start the example server and browser once for any number of test runs"""
+        if self._owns_capturer and not self._session_open:
+            self.capturer.__enter__()
+            if not self.capturer.start_local_server(self.examples_dir):
+                return False
+            self._session_open = True
+        return True
+
+    def close(self):
+        """Stop the session's server and release the browser shared across test runs"""
+        if not self._owns_capturer:
+            return
+        if self._session_open:
+            self.capturer.stop_local_server()
+            self._session_open = False
+        self.capturer.close()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def run_visual_tests(
         self, regenerate_examples: bool = True, capture_new_screenshots: bool = True
@@ -63,22 +126,21 @@ class VisualRegressionTester:
         print("🎯 Running Visual Regression Tests")
         print("=" * 40)
 
+        # Ensure per-run output directories exist
+        for directory in [self.current_dir, self.diff_dir]:
+            directory.mkdir(parents=True, exist_ok=True)
+
         # Step 1: Get example definitions
-        examples_by_type = {
-            "mermaid": get_mermaid_examples(),
-            "plantuml": get_plantuml_examples(),
-            "graphviz": get_graphviz_examples(),
-        }
+        examples_by_type = _load_examples()
 
         # Step 2: Regenerate examples if requested
         example_results = None
+        html_hashes = {}
         if regenerate_examples:
             print("🔄 Generating HTML files for diagram examples...")
             try:
-                from diagram_renderer import DiagramRenderer
-
-                renderer = DiagramRenderer()
-                examples_dir = Path(__file__).parent.parent.parent / "examples"
+                # Fail the run up front if the renderer can't be imported
+                renderer = _get_renderer()
 
                 example_results = {
                     "mermaid": {"success": []},
@@ -86,55 +148,182 @@ class VisualRegressionTester:
                     "graphviz": {"success": []},
                 }
 
-                # Generate HTML files
-                for diagram_type, examples in examples_by_type.items():
-                    for filename, diagram_info in examples.items():
-                        try:
-                            html_content = renderer.render_diagram_auto(diagram_info["code"])
-                            if html_content:
-                                html_path = examples_dir / filename
-                                with open(html_path, "w", encoding="utf-8") as f:
-                                    f.write(html_content)
-                                example_results[diagram_type]["success"].append(filename)
-                        except Exception:
-                            pass
+                # Generate HTML files, writing each one on a worker thread while the
+                # next example renders
+                from concurrent.futures import ThreadPoolExecutor
+
+                writes = {}
+                with ThreadPoolExecutor(max_workers=4) as writer:
+                    for diagram_type, examples in examples_by_type.items():
+                        for filename, diagram_info in examples.items():
+                            try:
+                                # Examples are grouped by type, so skip type detection
+                                html_content = renderer.render_known(
+                                    diagram_info["code"], diagram_type
+                                )
+                                if html_content:
+                                    html_bytes = html_content.encode("utf-8")
+                                    html_path = self.examples_dir / filename
+                                    writes[filename] = (
+                                        diagram_type,
+                                        writer.submit(html_path.write_bytes, html_bytes),
+                                    )
+                                    html_hashes[filename] = hashlib.sha256(html_bytes).hexdigest()
+                            except Exception:
+                                pass
+
+                for filename, (diagram_type, write) in writes.items():
+                    if write.exception() is None:
+                        example_results[diagram_type]["success"].append(filename)
+                    else:
+                        del html_hashes[filename]
             except Exception as e:
                 print(f"❌ Failed to generate examples: {e}")
                 return {"error": "Failed to generate examples"}
 
-        # Step 3: Capture current screenshots if requested
-        if capture_new_screenshots:
-            if not self._capture_current_screenshots(examples_by_type):
-                return {"error": "Failed to capture screenshots"}
-
-        # Step 4: Compare against baselines
-        comparison_results = self._compare_all_against_baselines(examples_by_type)
+        # Steps 3 and 4 are pipelined: each screenshot is compared against its baseline
+        # in a worker process as soon as it is captured, while capture continues
+        with self.comparator.process_pool(os.cpu_count()) as executor:
+            pending = {}
+
+            def start_comparison(diagram_type: str, filename: str, screenshot_path: Path):
+                baseline_type_dir = self.baselines_dir / diagram_type
+                if (baseline_type_dir / screenshot_path.name).exists():
+                    pending[filename] = self.comparator.start_comparison(
+                        executor,
+                        filename,
+                        baseline_type_dir,
+                        screenshot_path.parent,
+                        self.diff_dir,
+                    )
+
+            # Step 3: Capture current screenshots if requested
+            if capture_new_screenshots:
+                if not self._capture_current_screenshots(
+                    examples_by_type, html_hashes, start_comparison
+                ):
+                    return {"error": "Failed to capture screenshots"}
+
+            # Step 4: Compare against baselines, collecting comparisons already started
+            comparison_results = self._compare_all_against_baselines(
+                examples_by_type, pending, executor
+            )
 
         # Step 5: Generate test report
         report = self._generate_test_report(comparison_results, example_results)
 
         return report
 
-    def _capture_current_screenshots(self, examples_by_type: dict) -> bool:
-        """Capture current screenshots for comparison"""
-        examples_dir = Path(__file__).parent.parent.parent / "examples"
+    def _load_capture_hashes(self, browser_version: Optional[str]) -> dict:
+        """Load the HTML hashes recorded for current screenshots taken by this browser"""
+        if browser_version is None:
+            return {}
+        try:
+            recorded = json.loads(self.capture_hashes_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(recorded, dict) or recorded.get("browser_version") != browser_version:
+            return {}
+        return dict(recorded.get("html_hashes", {}))
+
+    def _capture_current_screenshots(
+        self,
+        examples_by_type: dict,
+        html_hashes: Optional[dict] = None,
+        on_captured: Optional[Callable[[str, str, Path], None]] = None,
+    ) -> bool:
+        """
+        Capture current screenshots for comparison.
 
-        if not self.capturer.start_local_server(examples_dir):
+        Examples whose freshly rendered HTML hashes the same as when their current
+        screenshot was taken, by the same browser version, reuse that screenshot
+        instead of being captured again. Screenshots taken before the diagram signalled
+        it was ready are never reused. on_captured is called for every screenshot that
+        is ready, reused or new.
+        """
+        html_hashes = html_hashes or {}
+        browser_version = self.capturer.browser_version() if html_hashes else None
+        recorded_hashes = self._load_capture_hashes(browser_version)
+
+        to_capture = {}
+        reused = 0
+        for diagram_type, examples in examples_by_type.items():
+            to_capture[diagram_type] = {}
+            for filename, diagram_info in examples.items():
+                screenshot_path = (
+                    self.current_dir / diagram_type / filename.replace(".html", ".png")
+                )
+                html_hash = html_hashes.get(filename)
+                if (
+                    html_hash is not None
+                    and recorded_hashes.get(filename) == html_hash
+                    and screenshot_path.exists()
+                ):
+                    reused += 1
+                    if on_captured is not None:
+                        on_captured(diagram_type, filename, screenshot_path)
+                else:
+                    to_capture[diagram_type][filename] = diagram_info
+
+        if reused:
+            print(f"♻️ Reusing {reused} screenshots of unchanged examples")
+        if not any(to_capture.values()):
+            return reused > 0
+
+        # Without a server already running, serve the examples just for this capture
+        serving = self.capturer.server_running
+        if not serving and not self.capturer.start_local_server(self.examples_dir):
             return False
 
         try:
             print("📸 Capturing current screenshots...")
-            results = self.capturer.capture_all_examples(examples_by_type, self.current_dir)
+            results = self.capturer.capture_all_examples(to_capture, self.current_dir, on_captured)
+
+            # Only fully rendered screenshots of known HTML can be reused by later runs
+            for diagram_type, type_results in results.items():
+                for filename in to_capture[diagram_type]:
+                    recorded_hashes.pop(filename, None)
+                not_ready = set(type_results.get("not_ready", ()))
+                for filename in type_results["success"]:
+                    if filename in html_hashes and filename not in not_ready:
+                        recorded_hashes[filename] = html_hashes[filename]
+            if browser_version is not None:
+                self.capture_hashes_path.write_text(
+                    json.dumps(
+                        {"browser_version": browser_version, "html_hashes": recorded_hashes},
+                        indent=2,
+                    )
+                )
+            else:
+                # Screenshots may have been replaced, so the old record no longer applies
+                self.capture_hashes_path.unlink(missing_ok=True)
 
             total_captured = sum(len(r["success"]) for r in results.values())
             print(f"✅ Captured {total_captured} screenshots")
-            return total_captured > 0
+            return total_captured + reused > 0
 
         finally:
-            self.capturer.stop_local_server()
+            if not serving:
+                self.capturer.stop_local_server()
+
+    def _compare_all_against_baselines(
+        self,
+        examples_by_type: dict,
+        pending: Optional[dict] = None,
+        executor: Optional["Executor"] = None,
+    ) -> dict:
+        """
+        Compare all current screenshots against baselines.
+
+        pending maps filenames to comparisons already started during capture. Every
+        remaining comparison across all diagram types is submitted to executor as one
+        batch before any result is awaited; without one, a process pool is opened for
+        the batch.
+        """
+        if executor is None:
+            with self.comparator.process_pool(os.cpu_count()) as executor:
+                return self._compare_all_against_baselines(examples_by_type, pending, executor)
 
-    def _compare_all_against_baselines(self, examples_by_type: dict) -> dict:
-        """Compare all current screenshots against baselines"""
         overall_results = {
             "passed": [],
             "failed": [],
@@ -142,6 +331,17 @@ class VisualRegressionTester:
             "comparison_details": {},
         }
 
+        pending = dict(pending or {})
+        for diagram_type, examples in examples_by_type.items():
+            self.comparator.start_batch(
+                executor,
+                self.baselines_dir / diagram_type,
+                self.current_dir / diagram_type,
+                self.diff_dir,
+                examples,
+                pending,
+            )
+
         for diagram_type, examples in examples_by_type.items():
             print(f"\n🔍 Comparing {diagram_type.upper()} examples...")
 
@@ -153,7 +353,7 @@ class VisualRegressionTester:
                 continue
 
             results = self.comparator.compare_diagram_examples(
-                baseline_type_dir, current_type_dir, self.diff_dir, examples
+                baseline_type_dir, current_type_dir, self.diff_dir, examples, pending
             )
 
             # Aggregate results
@@ -172,7 +372,8 @@ class VisualRegressionTester:
         self, comparison_results: dict, example_results: Optional[dict] = None
     ) -> dict:
         """Generate comprehensive test report"""
-        timestamp = datetime.now().isoformat()
+        now = datetime.now()
+        timestamp = now.isoformat()
 
         # Calculate summary statistics
         total_tests = len(comparison_results["passed"]) + len(comparison_results["failed"])
@@ -199,30 +400,44 @@ class VisualRegressionTester:
         if example_results:
             report["example_generation"] = example_results
 
-        # Save report
-        report_path = self.artifacts_dir / f"visual_test_report_{timestamp.replace(':', '-')}.json"
-        with open(report_path, "w") as f:
-            json.dump(report, f, indent=2)
-
-        # Print summary
-        print("\n📋 Visual Regression Test Results")
-        print(f"   Tests: {total_tests}")
-        print(f"   Passed: {len(comparison_results['passed'])} ({pass_rate:.1f}%)")
-        print(f"   Failed: {len(comparison_results['failed'])}")
+        # Build the human-readable summary once, for both the console and a text copy
+        lines = [
+            "",
+            "📋 Visual Regression Test Results",
+            f"   Tests: {total_tests}",
+            f"   Passed: {len(comparison_results['passed'])} ({pass_rate:.1f}%)",
+            f"   Failed: {len(comparison_results['failed'])}",
+        ]
 
         if comparison_results["failed"]:
-            print("\n❌ Failed Tests:")
+            lines += ["", "❌ Failed Tests:"]
             for failed_test in comparison_results["failed"]:
                 details = comparison_results["comparison_details"].get(failed_test, {})
                 similarity = details.get("similarity", 0)
-                print(f"   - {failed_test} (similarity: {similarity:.3f})")
+                lines.append(f"   - {failed_test} (similarity: {similarity:.3f})")
 
         if comparison_results["missing_baseline"]:
-            print("\n⚠️ Missing Baselines:")
-            for missing in comparison_results["missing_baseline"]:
-                print(f"   - {missing}")
+            lines += ["", "⚠️ Missing Baselines:"]
+            lines += [f"   - {missing}" for missing in comparison_results["missing_baseline"]]
+
+        summary_text = "\n".join(lines) + "\n"
+
+        # Save a compact machine-readable report alongside the text summary. Creating the
+        # JSON file exclusively claims the name, so runs in the same second don't overwrite
+        # each other; later ones get a counter suffix.
+        report_stem = f"visual_test_report_{now.strftime('%Y%m%dT%H%M%S')}"
+        for attempt in itertools.count():
+            suffix = f"_{attempt}" if attempt else ""
+            report_path = self.artifacts_dir / f"{report_stem}{suffix}.json"
+            try:
+                with report_path.open("x") as f:
+                    f.write(json.dumps(report, separators=(",", ":")))
+                break
+            except FileExistsError:
+                continue
+        report_path.with_suffix(".txt").write_text(summary_text, encoding="utf-8")
 
-        print(f"\n📄 Detailed report: {report_path}")
+        sys.stdout.write(f"{summary_text}\n📄 Detailed report: {report_path}\n")
 
         return report
 
@@ -255,11 +470,10 @@ def main():
         return False
 
     # Run visual tests
-    tester = VisualRegressionTester(args.threshold, args.port)
-
-    results = tester.run_visual_tests(
-        regenerate_examples=not args.skip_regen, capture_new_screenshots=not args.skip_capture
-    )
+    with VisualRegressionTester(args.threshold, args.port) as tester:
+        results = tester.run_visual_tests(
+            regenerate_examples=not args.skip_regen, capture_new_screenshots=not args.skip_capture
+        )
 
     if "error" in results:
         print(f"❌ Visual testing failed: {results['error']}")